@@ -0,0 +1,123 @@
+# benchmarks/load_weights.py
+# Compares model load time and peak RSS of the weight formats, each in a fresh
+# process (so page cache is warm but nothing is already imported or allocated).
+#
+#   python benchmarks/load_weights.py                 # random-weight ResNet18 in a temp dir
+#   python benchmarks/load_weights.py --version 3     # an installed model
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Runs in the child: time + peak RSS of the load alone. On Linux the RSS
+# high-water mark is reset after the imports (shared by all formats);
+# elsewhere peak RSS includes `import torch`.
+CHILD = r"""
+import json, resource, sys, time
+import torch
+import torch.nn as nn
+from torchvision.models import resnet18
+from dermaai_cli.core import weights
+
+def rss_kb(field):
+    try:
+        with open("/proc/self/status") as f:
+            return next(int(l.split()[1]) for l in f if l.startswith(field + ":"))
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+mode, path, num_classes = sys.argv[1], sys.argv[2], int(sys.argv[3])
+try:
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # reset VmHWM
+except OSError:
+    pass
+base_rss = rss_kb("VmRSS")
+start = time.perf_counter()
+if mode == "pth-legacy":  # what load_model did before: full read + unpickle + copy into fresh params
+    model = resnet18(weights=None)
+    model.fc = nn.Linear(model.fc.in_features, num_classes)
+    model.load_state_dict(torch.load(path, map_location="cpu"))
+    model.eval()
+else:
+    model = weights.build_resnet18(weights.load_state_dict(path), num_classes)
+with torch.no_grad():
+    model(torch.zeros(1, 3, 224, 224))  # touch every weight page
+elapsed = time.perf_counter() - start
+peak = rss_kb("VmHWM")
+print(json.dumps({"load_s": elapsed, "peak_rss_mb": peak / 1024, "delta_rss_mb": (peak - base_rss) / 1024}))
+"""
+
+
+def run_child(mode, path, num_classes):
+    proc = subprocess.run(
+        [sys.executable, "-c", CHILD, mode, str(path), str(num_classes)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def prepare(workdir: Path, version: int = None):
+    """(pth path, num_classes): an installed model or a random-weight one"""
+    if version is not None:
+        from dermaai_cli.core import model_manager, inference
+        model_path, labels_path = model_manager.ensure_model_exists(version)
+        return model_path, len(inference.load_labels(labels_path))
+
+    import torch
+    import torch.nn as nn
+    from torchvision.models import resnet18
+    model = resnet18(weights=None)
+    model.fc = nn.Linear(model.fc.in_features, 5)
+    model_path = workdir / "dermai_model_v0.pth"
+    torch.save(model.state_dict(), model_path)
+    return model_path, 5
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare load time / peak RSS of weight formats")
+    parser.add_argument("--version", type=int, help="Installed model version (default: random weights)")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh processes per format")
+    parser.add_argument("--json", type=Path, help="Also write the results here")
+    args = parser.parse_args()
+
+    from dermaai_cli.core import weights
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        model_path, num_classes = prepare(tmp, args.version)
+        fp32 = weights.convert_to_safetensors(model_path, tmp / "fp32.safetensors")
+        fp16 = weights.convert_to_safetensors(model_path, tmp / "fp16.safetensors", fp16=True)
+        cases = {
+            "pth-legacy": model_path,
+            "pth-mmap": model_path,
+            "safetensors": fp32,
+            "safetensors-fp16": fp16,
+        }
+
+        results = {}
+        for name, path in cases.items():
+            runs = [run_child(name, path, num_classes) for _ in range(args.repeats)]
+            results[name] = {
+                "file_mb": path.stat().st_size / 1e6,
+                "load_ms_median": statistics.median(r["load_s"] for r in runs) * 1000,
+                "peak_rss_mb": statistics.median(r["peak_rss_mb"] for r in runs),
+                "delta_rss_mb": statistics.median(r["delta_rss_mb"] for r in runs),
+            }
+
+    print(f"{'format':<18}{'file MB':>10}{'load ms':>10}{'peak RSS MB':>14}{'+peak MB':>10}")
+    for name, r in results.items():
+        print(f"{name:<18}{r['file_mb']:>10.1f}{r['load_ms_median']:>10.1f}"
+              f"{r['peak_rss_mb']:>14.1f}{r['delta_rss_mb']:>10.1f}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, str(ROOT))
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/scaling.py
+# Throughput of `predict run --workers N` as the worker count grows, with the
+# cores split evenly between workers (torch threads = cores / workers).
+#
+#   python benchmarks/scaling.py                       # 1, 2, 4, ... up to the core count
+#   python benchmarks/scaling.py --workers 1 8 16 32 --images 2048
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from suite import make_fixtures  # noqa: E402
+
+
+def _powers_of_two(limit):
+    counts, n = [], 1
+    while n <= limit:
+        counts.append(n)
+        n *= 2
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Throughput scaling of sharded inference")
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts (default: 1, 2, 4, ... cores)")
+    parser.add_argument("--images", type=int, default=512, help="Synthetic images per run")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--json", type=Path, help="Also write the results here")
+    args = parser.parse_args(argv)
+
+    from dermaai_cli.core import inference, sharding
+
+    worker_counts = args.workers or _powers_of_two(os.cpu_count() or 1)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        model_path, labels_path, images = make_fixtures(Path(tmp), args.images)
+        bundle = inference.load_model(model_path, labels_path)
+        for workers in worker_counts:
+            threads = sharding.default_threads(workers)
+            start = time.perf_counter()
+            count = sum(1 for _ in sharding.run_sharded(bundle, images, workers, threads,
+                                                       batch_size=args.batch_size))
+            elapsed = time.perf_counter() - start  # includes worker start-up
+            results.append({"workers": workers, "threads": threads, "images": count,
+                            "seconds": elapsed, "images_per_s": count / elapsed})
+            print(f"workers={workers:<3} threads={threads:<3} {count / elapsed:8.1f} images/s "
+                  f"(x{count / elapsed / results[0]['images_per_s']:.2f})", flush=True)
+
+    if args.json:
+        args.json.write_text(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+# benchmarks/suite.py
+# Offline performance suite: synthetic images and a randomly initialised
+# ResNet18, so it runs anywhere without downloading a model. Results are
+# written as JSON (benchmarks/results/<timestamp>.json by default) and can be
+# compared with an earlier run.
+#
+#   python benchmarks/suite.py
+#   python benchmarks/suite.py --quick --compare benchmarks/results/<earlier>.json
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+NUM_CLASSES = 10
+STARTUP_COMMANDS = [["--help"], ["predict", "run", "--help"], ["get-models"]]
+OUTPUT_FORMATS = ["csv", "json", "md", "pdf", "parquet"]
+
+
+def _median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def make_fixtures(workdir: Path, num_images: int, image_size=(640, 480)):
+    """Random-weight model + labels and synthetic JPEGs"""
+    import numpy as np
+    import torch
+    import torch.nn as nn
+    from PIL import Image
+    from torchvision.models import resnet18
+
+    torch.manual_seed(0)
+    model = resnet18(weights=None)
+    model.fc = nn.Linear(model.fc.in_features, NUM_CLASSES)
+    model_path = workdir / "dermai_model_v0.pth"
+    labels_path = workdir / "classes_v0.txt"
+    torch.save(model.state_dict(), model_path)
+    labels_path.write_text("\n".join(f"class_{i}" for i in range(NUM_CLASSES)) + "\n")
+
+    rng = np.random.default_rng(0)
+    images = []
+    for i in range(num_images):
+        path = workdir / f"img_{i}.jpg"
+        pixels = rng.integers(0, 255, (image_size[1], image_size[0], 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(path, quality=90)
+        images.append(path)
+    return model_path, labels_path, images
+
+
+def bench_startup(repeats, home: Path):
+    """Wall-clock time of CLI commands in fresh processes"""
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home))
+    probe = "import sys; from dermaai_cli.cli import main; sys.argv = ['dermai'] + sys.argv[1:]; main()"
+    results = {}
+    for args in STARTUP_COMMANDS:
+        def run():
+            subprocess.run([sys.executable, "-c", probe, *args], cwd=ROOT, env=env,
+                           capture_output=True, check=True)
+        run()  # warm the page cache
+        results[" ".join(args)] = {"median_ms": _median_ms(run, repeats)}
+    return results
+
+
+def bench_load_model(model_path, labels_path, repeats):
+    from dermaai_cli.core import inference
+    return {"median_ms": _median_ms(lambda: inference.load_model(model_path, labels_path), repeats)}
+
+
+def bench_latency(bundle, images, repeats):
+    """End-to-end single-image latency (decode + transform + forward)"""
+    from dermaai_cli.core import benchmark, inference
+
+    model, class_names = bundle
+    inference.predict_image(model, images[0], class_names)  # warm-up
+    latencies = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        inference.predict_image(model, images[i % len(images)], class_names)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "samples": len(latencies),
+        "p50_ms": benchmark.percentile(latencies, 50),
+        "p90_ms": benchmark.percentile(latencies, 90),
+        "p99_ms": benchmark.percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies),
+    }
+
+
+def bench_throughput(bundle, images, batch_sizes, iterations):
+    """Images/s through run_inference (decode pipeline included) and through the model alone"""
+    from dermaai_cli.core import benchmark, inference
+
+    results = {}
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        count = sum(1 for _ in inference.run_inference(bundle, images, batch_size=batch_size))
+        elapsed = time.perf_counter() - start
+        forward = benchmark.time_forward(bundle[0], batch_size, iterations=iterations, warmup=1)
+        results[f"batch_{batch_size}"] = {
+            "end_to_end_images_per_s": count / elapsed,
+            "forward_images_per_s": forward["images_per_s"],
+            "forward_p50_ms": forward["p50_ms"],
+        }
+    return results
+
+
+def _synthetic_results(rows):
+    for i in range(rows):
+        yield {"image": f"scans/patient_{i // 10}/img_{i}.jpg", "prediction": f"class_{i % NUM_CLASSES}",
+               "confidence": round(50 + (i * 37 % 5000) / 100, 2)}
+
+
+def bench_save_results(workdir: Path, row_counts, formats, max_pdf_rows):
+    from dermaai_cli.core import output
+
+    results = {}
+    for fmt in formats:
+        for rows in row_counts:
+            key = f"{fmt}_{rows}"
+            if fmt == "pdf" and rows > max_pdf_rows:
+                results[key] = {"skipped": f"more than --max-pdf-rows {max_pdf_rows}"}
+                continue
+            path = workdir / f"bench.{fmt}"
+            start = time.perf_counter()
+            output.save_results(_synthetic_results(rows), fmt, path)
+            elapsed = time.perf_counter() - start
+            results[key] = {
+                "ms": elapsed * 1000,
+                "rows_per_s": rows / elapsed,
+                "file_mb": path.stat().st_size / 1e6,
+            }
+    return results
+
+
+def environment():
+    import torch
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+def _flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name + "."))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def compare(current, previous):
+    """Print metrics side by side with the relative change"""
+    old = _flatten(previous["results"])
+    new = _flatten(current["results"])
+    print(f"\nCompared with {previous['environment'].get('commit') or '?'} "
+          f"({previous['environment'].get('timestamp')}):")
+    for name in sorted(new):
+        if name in old and old[name]:
+            change = (new[name] - old[name]) / old[name] * 100
+            print(f"  {name:<55}{old[name]:>12.2f} -> {new[name]:>12.2f}  {change:+6.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline DermaAI performance suite")
+    parser.add_argument("--output", type=Path, help="Results JSON (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results JSON to compare against")
+    parser.add_argument("--images", type=int, default=64, help="Synthetic images for latency/throughput")
+    parser.add_argument("--repeats", type=int, default=5, help="Repeats for start-up and load timings")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000], help="save_results row counts")
+    parser.add_argument("--formats", nargs="+", default=OUTPUT_FORMATS, choices=OUTPUT_FORMATS)
+    parser.add_argument("--max-pdf-rows", type=int, default=10_000,
+                        help="Skip PDF runs above this many rows (PDF tables are laid out in memory)")
+    parser.add_argument("--quick", action="store_true", help="Small sizes for a fast smoke run")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.images, args.repeats, args.rows = 16, 2, [1_000]
+    if "parquet" in args.formats and importlib.util.find_spec("pyarrow") is None:
+        print("Skipping parquet output: pyarrow is not installed (pip install 'dermaai[parquet]')")
+        args.formats = [fmt for fmt in args.formats if fmt != "parquet"]
+
+    from dermaai_cli.core import inference
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        model_path, labels_path, images = make_fixtures(tmp, args.images)
+        bundle = inference.load_model(model_path, labels_path)
+
+        steps = [
+            ("startup", lambda: bench_startup(args.repeats, tmp)),
+            ("load_model", lambda: bench_load_model(model_path, labels_path, args.repeats)),
+            ("latency", lambda: bench_latency(bundle, images, max(args.images, 20))),
+            ("throughput", lambda: bench_throughput(bundle, images, [1, 16, 32], iterations=5)),
+            ("save_results", lambda: bench_save_results(tmp, args.rows, args.formats, args.max_pdf_rows)),
+        ]
+        for name, step in steps:
+            print(f"Running {name}...", flush=True)
+            results[name] = step()
+
+    report = {"environment": environment(), "results": results}
+    output_path = args.output or RESULTS_DIR / f"{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, indent=2))
+    print(json.dumps(results, indent=2))
+    print(f"\nResults saved to {output_path}")
+
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
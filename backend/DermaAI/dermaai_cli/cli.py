@@ -1,11 +1,12 @@
 # dermaai_cli/cli.py
 import typer
-from dermaai_cli.commands import predict, models, interactive
+from dermaai_cli.commands import predict, models, interactive, serve
 
 app = typer.Typer(help="DermaAI CLI - Skin Lesion Detection Tool v1")
 app.add_typer(predict.app, name="predict", help="Run predictions on images")
 app.add_typer(models.app, help="Manage models (get-models, model-info, download-model)")
 app.add_typer(interactive.app, help="Start interactive REPL mode")
+app.add_typer(serve.app, help="Run the local inference daemon (serve, serve-status)")
 
 
 def main():
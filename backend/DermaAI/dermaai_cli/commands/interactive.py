@@ -1,45 +1,160 @@
 # dermaai_cli/commands/interactive.py
 import typer
-from dermaai_cli.core import inference, model_manager, output
+from concurrent.futures import ThreadPoolExecutor
+from dermaai_cli.core import client, config, model_manager
 from pathlib import Path
 
 app = typer.Typer()
 
+COMMANDS = ("predict <image>, predict-dir <folder>, models, model-info <v>, "
+            "switch-model <v>, preload <v>")
+
+
+def _print_results(results):
+    """Print result lines; returns prediction -> count"""
+    counts = {}
+    for r in results:
+        print(f"{r['image']} -> {r['prediction']} ({r['confidence']*100:.1f}%)")
+        counts[r["prediction"]] = counts.get(r["prediction"], 0) + 1
+    return counts
+
+
+def _report_preloads(pending):
+    """Announce background loads that finished since the last prompt"""
+    for version, future in list(pending.items()):
+        if future.done():
+            del pending[version]
+            if future.exception():
+                print(f"❌ Preloading model v{version} failed: {future.exception()}")
+            else:
+                print(f"Model v{version} preloaded")
+
 
 @app.command()
-def start():
+def start(
+    max_models: int = typer.Option(3, min=1, help="Models kept loaded (least recently used evicted)"),
+):
     """Start interactive REPL mode"""
     print("Welcome to DermaAI Interactive Mode")
     print("Type 'help' for commands, 'exit' to quit")
 
     current_model = None
+    current_version = None
+    server_url = client.find_server()
+    if server_url:
+        print(f"Using DermaAI daemon at {server_url}")
+
+    pool = None  # created on the first local load (imports torch)
+    # One loader thread: loads queue up instead of competing for the CPU
+    preloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dermai-preload")
+    pending = {}  # version -> future of a background load
+
+    def loader(version):
+        """Callable that loads a model (switching back to it later is then instant)"""
+        nonlocal pool
+        if server_url:
+            return lambda: client.load(server_url, version)
+        if pool is None:
+            from dermaai_cli.core.model_pool import ModelPool
+            pool = ModelPool(max_models)
+        return lambda: pool.get(version)
 
     while True:
-        cmd = input("dermai> ").strip()
+        _report_preloads(pending)
+        try:
+            cmd = input("dermai> ").strip()
+        except EOFError:
+            break
         if cmd in ("exit", "quit"):
             break
         elif cmd == "help":
-            print("Commands: predict <image>, models, model-info <v>, switch-model <v>")
+            print(f"Commands: {COMMANDS}")
         elif cmd.startswith("predict "):
             image = cmd.split(" ", 1)[1]
-            if not current_model:
+            if current_version is None:
+                print("No model loaded. Load one with 'switch-model <version>'")
+                continue
+            if server_url:
+                results = client.predict(server_url, [Path(image)], current_version)
+            else:
+                from dermaai_cli.core import inference
+                results = inference.run_inference(current_model, [Path(image)])
+            try:
+                _print_results(results)
+            except (client.DaemonError, OSError) as e:  # OSError includes undecodable images
+                print(f"❌ {e}")
+        elif cmd.startswith("predict-dir "):
+            folder = Path(cmd.split(" ", 1)[1]).expanduser()
+            if current_version is None:
                 print("No model loaded. Load one with 'switch-model <version>'")
                 continue
-            results = inference.run_inference(current_model, [Path(image)])
-            for r in results:
-                print(f"{r['image']} -> {r['prediction']} ({r['confidence']*100:.1f}%)")
+            if not folder.is_dir():
+                print(f"❌ Not a folder: {folder}")
+                continue
+            from dermaai_cli.core import sources
+            image_paths = sources.iter_dir(folder)
+            if server_url:
+                results = client.predict(server_url, image_paths, current_version)
+            else:
+                from dermaai_cli.core import inference
+                results = inference.run_inference(current_model, image_paths, batch_size=config.DEFAULT_BATCH_SIZE)
+            try:
+                counts = _print_results(results)
+            except KeyboardInterrupt:
+                print("Interrupted")
+                continue
+            except (client.DaemonError, OSError) as e:
+                print(f"❌ {e}")
+                continue
+            summary = ", ".join(f"{label}: {n}" for label, n in sorted(counts.items(), key=lambda c: -c[1]))
+            print(f"{sum(counts.values())} images scored with v{current_version}" + (f" ({summary})" if summary else ""))
         elif cmd == "models":
             models = model_manager.list_models()
             for m in models:
-                print(f"v{m['version']} - {m['path']}")
+                state = ""
+                if pool is not None and pool.is_loaded(m["version"]):
+                    state = " [loaded]"
+                elif m["version"] in pending:
+                    state = " [loading]"
+                print(f"v{m['version']} - {m['path']}{state}")
         elif cmd.startswith("switch-model "):
-            version = int(cmd.split(" ", 1)[1])
-            model_path, labels_path = model_manager.ensure_model_exists(version)
-            current_model = inference.load_model(model_path, labels_path)
+            try:
+                version = int(cmd.split(" ", 1)[1])
+            except ValueError:
+                print("❌ Usage: switch-model <version>")
+                continue
+            try:
+                # Waits for a background load of the same version instead of starting another
+                bundle = loader(version)()
+            except Exception as e:
+                print(f"❌ Could not load model: {e}")
+                continue
+            if not server_url:
+                current_model = bundle
+            current_version = version
             print(f"Switched to model v{version}")
+        elif cmd.startswith("preload "):
+            try:
+                version = int(cmd.split(" ", 1)[1])
+            except ValueError:
+                print("❌ Usage: preload <version>")
+                continue
+            if version not in pending:
+                pending[version] = preloader.submit(loader(version))
+            print(f"Loading model v{version} in the background")
         elif cmd.startswith("model-info "):
-            version = int(cmd.split(" ", 1)[1])
-            info = model_manager.get_model_info(version)
+            try:
+                version = int(cmd.split(" ", 1)[1])
+            except ValueError:
+                print("❌ Usage: model-info <version>")
+                continue
+            try:
+                info = model_manager.get_model_info(version)
+            except ValueError as e:  # not installed
+                print(f"❌ {e}")
+                continue
             print(info)
         else:
             print("Unknown command. Type 'help'.")
+
+    preloader.shutdown(wait=False, cancel_futures=True)
@@ -1,8 +1,11 @@
 # dermaai_cli/commands/models.py
+import itertools
+from pathlib import Path
+
 import typer
 from rich.console import Console
 from rich.table import Table
-from dermaai_cli.core import model_manager
+from dermaai_cli.core import model_manager, config
 
 app = typer.Typer()
 console = Console()
@@ -49,6 +52,59 @@ def download_model(version: int):
     console.print("[bold green]Done.[/bold green]")
 
 
+@app.command("sync")
+def sync_models(
+    versions: list[int] = typer.Argument(None, help="Versions to check (default: all installed)"),
+    refresh: bool = typer.Option(False, "--refresh", help="Ignore the cached list of published versions"),
+):
+    """
+    Re-fetch installed model files only if they changed in S3 (ETag check)
+    (example command: dermai sync)
+    """
+    versions = versions or [m["version"] for m in model_manager.list_models()]
+    if not versions:
+        console.print("[yellow]No models installed yet.[/yellow]")
+
+    table = Table(title="Model Sync")
+    table.add_column("Version", style="cyan", justify="center")
+    table.add_column("File", style="magenta")
+    table.add_column("Status", justify="center")
+
+    updated = []
+    failed = False
+    for version in versions:
+        try:
+            status = model_manager.sync_model(version)
+        except (ValueError, RuntimeError) as e:
+            console.print(f"[red]{str(e)}[/red]")
+            failed = True
+            continue
+        for name, state in status.items():
+            table.add_row(str(version), name, "[green]updated[/green]" if state == "updated" else state)
+        if "updated" in status.values():
+            updated.append(version)
+    if table.rows:
+        console.print(table)
+
+    for version in updated:
+        console.print(
+            f"[yellow]Model v{version} changed: re-run export-onnx/quantize for its variants "
+            "and restart 'dermai serve' if it is running.[/yellow]"
+        )
+
+    try:
+        remote = model_manager.list_remote_versions(refresh=refresh)
+    except (RuntimeError, ValueError) as e:
+        console.print(f"[red]{str(e)}[/red]")
+        raise typer.Exit(code=1)
+    installed = {m["version"] for m in model_manager.list_models()}
+    new = [v for v in remote if v not in installed]
+    if new:
+        console.print(f"New versions available: {', '.join(f'v{v}' for v in new)} (dermai download-model <version>)")
+    if failed:
+        raise typer.Exit(code=1)
+
+
 @app.command("model-info")
 def model_info(version: int):
     """
@@ -87,3 +143,196 @@ def model_info(version: int):
         console.print(classes_table)
     else:
         console.print("[yellow]No classes found for this model.[/yellow]")
+
+
+@app.command("export-onnx")
+def export_onnx(
+    version: int,
+    parity_samples: int = typer.Option(32, min=1, help="Synthetic images used for the parity check"),
+):
+    """
+    Export a model to ONNX next to its .pth and check top-1 parity with PyTorch
+    (example command: dermai export-onnx <version>)
+    """
+    from dermaai_cli.core import inference, benchmark, onnx_engine
+
+    model_path, labels_path = model_manager.ensure_model_exists(version)
+    model, _ = inference.load_model(model_path, labels_path)
+    onnx_path = onnx_engine.onnx_path_for(model_path)
+
+    console.print(f"[cyan]Exporting model v{version} to ONNX...[/cyan]")
+    onnx_engine.export_onnx(model, onnx_path)
+
+    try:
+        onnx_model = onnx_engine.OnnxModel(onnx_path)
+    except RuntimeError as e:
+        console.print(f"[red]{str(e)}[/red]")
+        raise typer.Exit(code=1)
+    parity = onnx_engine.check_parity(model, onnx_model, benchmark.synthetic_batch(parity_samples))
+
+    model_manager.update_model_metadata(version, onnx_path=str(onnx_path))
+    console.print(f"[green]✔ ONNX path:[/green] {onnx_path}")
+    console.print(
+        f"Parity on {parity['samples']} samples: "
+        f"top-1 agreement {parity['top1_agreement']:.1%}, "
+        f"max |logit diff| {parity['max_abs_diff']:.2e}"
+    )
+    if parity["top1_agreement"] < 1.0:
+        console.print("[red]✖ ONNX top-1 predictions differ from PyTorch.[/red]")
+        raise typer.Exit(code=1)
+    console.print("[bold green]Done.[/bold green]")
+
+
+@app.command("convert-weights")
+def convert_weights(
+    version: int,
+    fp16: bool = typer.Option(False, "--fp16", help="Store weights as float16 on disk (half the size, upcast at load)"),
+    parity_samples: int = typer.Option(32, min=1, help="Synthetic images used for the parity check"),
+):
+    """
+    Convert a model's .pth to memory-mappable .safetensors, used automatically at load
+    (example command: dermai convert-weights <version> --fp16)
+    """
+    from dermaai_cli.core import benchmark, inference, onnx_engine, weights
+
+    model_path, labels_path = model_manager.ensure_model_exists(version)
+    num_classes = len(inference.load_labels(labels_path))
+
+    console.print(f"[cyan]Converting model v{version} to safetensors{' (fp16)' if fp16 else ''}...[/cyan]")
+    try:
+        out_path = weights.convert_to_safetensors(model_path, fp16=fp16)
+    except RuntimeError as e:
+        console.print(f"[red]{str(e)}[/red]")
+        raise typer.Exit(code=1)
+
+    reference = weights.build_resnet18(weights.load_state_dict(model_path), num_classes)
+    converted = weights.build_resnet18(weights.load_state_dict(out_path), num_classes)
+    parity = onnx_engine.check_parity(reference, converted, benchmark.synthetic_batch(parity_samples))
+
+    model_manager.update_model_metadata(
+        version, safetensors_path=str(out_path), weights_dtype="float16" if fp16 else "float32"
+    )
+    console.print(f"[green]✔ Weights path:[/green] {out_path}")
+    console.print(
+        f"Size: {model_path.stat().st_size / 1e6:.1f} MB (.pth) -> {out_path.stat().st_size / 1e6:.1f} MB"
+    )
+    console.print(
+        f"Parity on {parity['samples']} samples: "
+        f"top-1 agreement {parity['top1_agreement']:.1%}, "
+        f"max |logit diff| {parity['max_abs_diff']:.2e}"
+    )
+    if parity["top1_agreement"] < 1.0:
+        console.print("[yellow]⚠ Some top-1 predictions differ from the .pth weights.[/yellow]")
+    console.print("[bold green]Done.[/bold green]")
+
+
+@app.command("benchmark")
+def benchmark_model(
+    version: int,
+    engines: list[str] = typer.Option(list(config.ENGINES), "--engine", help="Engines to compare"),
+    batch_size: int = typer.Option(16, min=1, help="Images per forward pass"),
+    iterations: int = typer.Option(20, min=1, help="Timed forward passes per engine"),
+):
+    """
+    Compare latency and throughput of inference engines on synthetic images
+    (example command: dermai benchmark <version> --engine torch --engine onnx)
+    """
+    from dermaai_cli.core import inference, benchmark
+
+    model_path, labels_path = model_manager.ensure_model_exists(version)
+
+    table = Table(title=f"Model v{version} benchmark (batch size {batch_size})")
+    table.add_column("Engine", style="cyan")
+    table.add_column("p50 batch (ms)", justify="right")
+    table.add_column("p95 batch (ms)", justify="right")
+    table.add_column("Images/s", style="bold blue", justify="right")
+    table.add_column("Speedup", style="green", justify="right")
+
+    baseline = None
+    for engine in engines:
+        try:
+            model, _ = inference.load_model(model_path, labels_path, engine=engine)
+        except (ValueError, FileNotFoundError, RuntimeError) as e:
+            console.print(f"[yellow]Skipping {engine}: {str(e)}[/yellow]")
+            continue
+        stats = benchmark.time_forward(model, batch_size=batch_size, iterations=iterations)
+        baseline = baseline or stats["images_per_s"]
+        table.add_row(
+            engine,
+            f"{stats['p50_ms']:.1f}",
+            f"{stats['p95_ms']:.1f}",
+            f"{stats['images_per_s']:.1f}",
+            f"{stats['images_per_s'] / baseline:.2f}x",
+        )
+
+    console.print(table)
+
+
+@app.command("quantize")
+def quantize(
+    version: int,
+    calibration_dir: Path = typer.Option(..., help="Folder of sample images (searched recursively)"),
+    mode: str = typer.Option("static", help="static (int8 conv+fc, calibrated) | dynamic (int8 fc only)"),
+    max_images: int = typer.Option(256, min=1, help="Max calibration images"),
+    batch_size: int = typer.Option(32, min=1, help="Images per calibration batch"),
+):
+    """
+    Build an int8 variant of a model and report agreement/speedup vs fp32
+    (example command: dermai quantize <version> --calibration-dir ./samples)
+    """
+    import torch
+    from dermaai_cli.core import inference, quantization
+
+    if mode not in quantization.VARIANT_NAMES:
+        console.print(f"[red]Unknown mode: {mode}. Choose one of: {', '.join(quantization.VARIANT_NAMES)}[/red]")
+        raise typer.Exit(code=1)
+
+    image_paths = sorted(
+        p for p in calibration_dir.rglob("*") if p.suffix.lower() in config.IMAGE_EXTENSIONS
+    )[:max_images]
+    if not image_paths:
+        console.print(f"[red]No images found in {calibration_dir}[/red]")
+        raise typer.Exit(code=1)
+
+    model_path, labels_path = model_manager.ensure_model_exists(version)
+    fp32_model, class_names = inference.load_model(model_path, labels_path)
+
+    console.print(f"[cyan]Preprocessing {len(image_paths)} calibration images...[/cyan]")
+    tensors = [t for _, t in inference.iter_preprocessed(image_paths) if t is not None]
+    batches = [torch.stack(tensors[i:i + batch_size]) for i in range(0, len(tensors), batch_size)]
+
+    console.print(f"[cyan]Quantizing model v{version} ({mode})...[/cyan]")
+    if mode == "static":
+        state_dict = torch.load(model_path, map_location="cpu")
+        int8_model, qengine = quantization.quantize_static(state_dict, len(class_names), batches)
+    else:
+        int8_model, qengine = quantization.quantize_dynamic(fp32_model)
+
+    variant = quantization.VARIANT_NAMES[mode]
+    variant_path = quantization.variant_path_for(model_path, variant)
+    torch.save(int8_model.state_dict(), variant_path)
+
+    # Warm both models once so the timing compares steady-state forward passes
+    report = quantization.compare_models(fp32_model, int8_model, itertools.islice(batches, 1))
+    report = quantization.compare_models(fp32_model, int8_model, batches)
+
+    model_manager.add_model_variant(version, variant, {
+        "path": str(variant_path),
+        "mode": mode,
+        "qengine": qengine,
+        "calibration_images": report["samples"],
+        "top1_agreement": round(report["top1_agreement"], 4),
+        "speedup": round(report["speedup"], 2),
+    })
+
+    table = Table(title=f"Model v{version} {variant} vs fp32")
+    table.add_column("Key", style="cyan")
+    table.add_column("Value", style="magenta")
+    table.add_row("Path", str(variant_path))
+    table.add_row("Images compared", str(report["samples"]))
+    table.add_row("Top-1 agreement", f"{report['top1_agreement']:.2%}")
+    table.add_row("fp32 forward (s)", f"{report['fp32_s']:.2f}")
+    table.add_row("int8 forward (s)", f"{report['int8_s']:.2f}")
+    table.add_row("Speedup", f"{report['speedup']:.2f}x")
+    console.print(table)
+    console.print(f"[bold green]Done.[/bold green] Use it with: dermai predict run --model-version {version} --variant {variant}")
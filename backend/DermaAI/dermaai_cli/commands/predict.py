@@ -1,9 +1,10 @@
 # dermaai_cli/commands/predict.py
-import json
 import typer
 import socket
+import sqlite3
+from itertools import chain
 from pathlib import Path
-from dermaai_cli.core import inference, output, model_manager
+from dermaai_cli.core import client, config, jobs, profiler as profiling, sources
 
 app = typer.Typer()
 
@@ -21,12 +22,37 @@ def _internet_available(host="8.8.8.8", port=53, timeout=3):
 @app.command()
 def run(
     mode: str = typer.Option("offline", help="Inference mode: offline or online"),
-    model_version: int = typer.Option(..., help="Model version to use"),
+    model_version: list[int] = typer.Option(..., help="Model version to use (repeat to compare versions on the same images)"),
     images: list[Path] = typer.Option(None, help="Image file paths"),
     images_source_file: Path = typer.Option(None, help="File with image paths/JSON"),
-    output_format: str = typer.Option(None, help="Output format: pdf|csv|json|md"),
+    images_dir: list[Path] = typer.Option(None, help="Folder(s) of images (.jpg/.jpeg/.png)"),
+    glob_patterns: list[str] = typer.Option(None, "--glob", help="Glob pattern(s), e.g. 'scans/**/*.jpg'"),
+    recursive: bool = typer.Option(True, "--recursive/--no-recursive", help="Include subfolders of --images-dir"),
+    output_format: str = typer.Option(None, help="Output format: pdf|csv|json|md|parquet"),
     output_path: Path = typer.Option(None, help="Directory where to save results"),
     output_filename: str = typer.Option(None, help="Output file name (without extension)"),
+    batch_size: int = typer.Option(
+        config.DEFAULT_BATCH_SIZE, min=1, help="Images per forward pass"
+    ),
+    decode_workers: int = typer.Option(
+        config.DEFAULT_DECODE_WORKERS, min=0,
+        help="Threads decoding images ahead of the model (0 = decode inline)"
+    ),
+    prefetch: int = typer.Option(
+        None, min=1, help="Max decoded images queued ahead of the model (default: 2 x batch size)"
+    ),
+    engine: str = typer.Option("torch", help="Inference engine: torch|onnx"),
+    variant: str = typer.Option(None, help="Model variant, e.g. int8 (see: dermai quantize)"),
+    use_daemon: bool = typer.Option(True, "--daemon/--no-daemon", help="Use a running 'dermai serve' daemon if available"),
+    use_cache: bool = typer.Option(True, "--cache/--no-cache", help="Reuse cached predictions for identical images"),
+    checkpoint: bool = typer.Option(False, "--checkpoint", help="Journal completed images so an interrupted run can --resume"),
+    resume: bool = typer.Option(False, "--resume", help="Skip images already in the journal of an interrupted run (implies --checkpoint)"),
+    profile: bool = typer.Option(False, "--profile", help="Print per-stage timings and an image latency histogram (scores in this process)"),
+    trace: Path = typer.Option(None, help="Write a Chrome trace (JSON timeline) of the run here (implies --profile)"),
+    torch_profile: bool = typer.Option(False, "--torch-profile", help="Also run forward passes under the torch profiler (implies --profile)"),
+    workers: int = typer.Option(1, min=1, help="Processes scoring shards of the images (share one copy of the weights)"),
+    threads: int = typer.Option(None, min=1, help="Torch threads per process (default with --workers: cores / workers)"),
+    probabilities: bool = typer.Option(False, "--probabilities", help="Also store every class's probability (parquet output; scores every image)"),
 ):
     """
     Run predictions on images with flexible output handling.
@@ -42,14 +68,37 @@ def run(
           ]
         }
 
-      --output-format json → results.json in current dir
+      --images-dir ./scans → every image under ./scans (recursively)
+      --glob 'scans/2025-*/*.jpg' → images matching the pattern
+
+      --output-format json → results.json (JSON Lines) in current dir
+      --output-format parquet --probabilities → results.parquet with a float32
+         probability vector per image (class names in the file metadata)
       --output-filename report → report.md in current dir
       --output-path ./exports → results.md in ./exports
       --output-path ./exports --output-filename report --output-format csv
          → ./exports/report.csv
+      --batch-size 64 → score 64 images per forward pass
+      --decode-workers 8 --prefetch 256 → 8 decode threads, up to 256 images ready
+      --engine onnx → run through ONNX Runtime (after `dermai export-onnx <version>`)
+      --variant int8 → use the int8 model (after `dermai quantize <version>`)
+      --no-daemon → load the model in this process even if `dermai serve` is running
+      --no-cache → re-score every image instead of reusing ~/.dermai/prediction_cache.db
+      --checkpoint → journal finished images to results.md.journal while running
+      --resume → continue an interrupted --checkpoint run, skipping journaled images
+      --profile --trace run.json → stage timings, plus a timeline for chrome://tracing / Perfetto
+      --workers 8 --threads 4 → 8 processes with 4 torch threads each, results in input order
+      --model-version 3 --model-version 4 → both models score each decoded image once;
+         per-version prediction/confidence columns plus an agreement summary
     """
 
-    typer.echo(f"Running in {mode} mode with model v{model_version}")
+    versions = list(dict.fromkeys(model_version))
+    compare = len(versions) > 1
+    model_version = versions[0]
+    if compare:
+        typer.echo(f"Running in {mode} mode comparing models " + ", ".join(f"v{v}" for v in versions))
+    else:
+        typer.echo(f"Running in {mode} mode with model v{model_version}")
 
     # --- Default fallbacks ---
     if output_format is None:
@@ -60,7 +109,7 @@ def run(
         output_path = Path(".")
 
     # --- Validation ---
-    valid_formats = {"pdf", "csv", "json", "md"}
+    valid_formats = {"pdf", "csv", "json", "md", "parquet"}
     if output_format not in valid_formats:
         typer.secho(
             f"❌ Unsupported output format: '{output_format}'. "
@@ -69,6 +118,37 @@ def run(
         )
         raise typer.Exit(code=1)
 
+    if engine not in config.ENGINES:
+        typer.secho(
+            f"❌ Unsupported engine: '{engine}'. Choose one of: {', '.join(config.ENGINES)}",
+            fg=typer.colors.RED,
+        )
+        raise typer.Exit(code=1)
+
+    if variant and engine != "torch":
+        typer.secho("❌ --variant is only supported with --engine torch.", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+
+    if workers > 1 and (engine != "torch" or variant):
+        typer.secho("❌ --workers needs --engine torch without --variant.", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+
+    if workers > 1 and (profile or trace or torch_profile):
+        typer.secho("❌ --profile/--trace/--torch-profile can't be combined with --workers.", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+
+    if compare and workers > 1:
+        typer.secho("❌ --workers can't be combined with several --model-version values.", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+
+    if probabilities and output_format != "parquet":
+        typer.secho("❌ --probabilities needs --output-format parquet.", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+
+    if probabilities and compare:
+        typer.secho("❌ --probabilities can't be combined with several --model-version values.", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+
     # Check if output_path looks like a file
     if output_path.suffix:  # e.g., user passed "results.json"
         typer.secho(
@@ -98,45 +178,53 @@ def run(
         )
         raise typer.Exit(code=1)
 
-    # Collect images
-    image_paths = []
-    if images:
-        image_paths.extend(images)
-    if images_source_file:
-        try:
-            # Try parsing as JSON
-            with open(images_source_file, "r") as f:
-                data = json.load(f)
-
-            if isinstance(data, dict) and "images" in data:
-                image_paths.extend([Path(p) for p in data["images"]])
-            elif isinstance(data, list):
-                image_paths.extend([Path(p) for p in data])
-            else:
-                typer.secho(
-                    f"❌ Invalid JSON format in {images_source_file}. "
-                    "Expected {'images': [...]} or a list of paths.",
-                    fg=typer.colors.RED,
-                )
-                raise typer.Exit(code=1)
-
-        except json.JSONDecodeError:
-            # Not JSON → fallback to plain text file
-            with open(images_source_file, "r") as f:
-                lines = f.readlines()
-            image_paths.extend([Path(l.strip()) for l in lines if l.strip()])
-
-    if not image_paths:
+    # Collect images lazily: nothing is listed up front, scoring starts right away
+    image_paths = sources.iter_image_paths(
+        images,
+        [images_source_file] if images_source_file else None,
+        images_dir,
+        glob_patterns,
+        recursive,
+    )
+    try:
+        first = next(image_paths, None)
+    except (OSError, ValueError) as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+    if first is None:
         typer.secho(
             "❌ No images provided.\n"
-            "   👉 Use --images img1.jpg img2.jpg OR --images-source-file file.txt",
+            "   👉 Use --images img1.jpg img2.jpg, --images-source-file file.txt, "
+            "--images-dir folder OR --glob 'folder/**/*.jpg'",
             fg=typer.colors.RED,
         )
         raise typer.Exit(code=1)
+    image_paths = chain([first], image_paths)
 
     # Final output file
     final_output = output_path / f"{output_filename}.{output_format}"
 
+    # Checkpoint journal: results already scored by an interrupted run are reused
+    journal = None
+    done = {}
+    resumed = None
+    if checkpoint or resume:
+        journal = jobs.JobJournal(
+            jobs.journal_path_for(final_output),
+            # Rows with and without probability vectors can't be mixed in one output
+            "+".join(config.model_key(v, engine, variant) for v in versions) + ("+probabilities" if probabilities else ""),
+        )
+        try:
+            done = journal.load() if resume else {}
+        except ValueError as e:
+            typer.secho(f"❌ {e}", fg=typer.colors.RED)
+            raise typer.Exit(code=1)
+        if done:
+            typer.echo(f"Resuming: {len(done)} images already done ({journal.path})")
+            resumed = jobs.ResumedRun(done)
+            image_paths = resumed.remaining(image_paths)
+        journal.open(resume=resume)
+
     # Handle online/offline fallback
     if mode.lower() == "online" and not _internet_available():
         typer.secho(
@@ -145,13 +233,185 @@ def run(
         )
         mode = "offline"
 
-    # Load model + labels
-    model_path, labels_path = model_manager.ensure_model_exists(model_version)
-    model_bundle = inference.load_model(model_path, labels_path)
+    from dermaai_cli.core import output
 
-    # Run inference
-    results = inference.run_inference(model_bundle, image_paths, mode)
+    profiler = profiling.NULL_PROFILER
+    if profile or trace or torch_profile:
+        profiler = profiling.Profiler(torch_profile=torch_profile)
+    run_start = profiler.clock()
 
-    # Save results
-    output.save_results(results, output_format, final_output)
+    # Score through the daemon when one is running (model already loaded there);
+    # profiling, --workers, comparisons and probabilities need the scoring to run here
+    local_only = profiler.enabled or workers > 1 or compare or probabilities
+    if probabilities:
+        use_cache = False  # cached predictions only keep the top-1 label and confidence
+    server_url = client.find_server() if use_daemon and not local_only else None
+    cache = None
+    cache_stats = {}
+    agreement = None
+    class_names = None
+    if server_url:
+        typer.echo(f"Using DermaAI daemon at {server_url}")
+        results = client.predict(
+            server_url, image_paths, model_version,
+            engine=engine, variant=variant, batch_size=batch_size,
+            use_cache=use_cache, cache_stats=cache_stats,
+        )
+    else:
+        # torch is only imported when scoring in this process
+        from dermaai_cli.core import inference
+        from dermaai_cli.core.model_pool import cache_key, load_bundle
+        from dermaai_cli.core.prediction_cache import PredictionCache
+
+        # Load model + labels
+        try:
+            model_bundles = {f"v{v}": load_bundle(v, engine, variant, profiler=profiler) for v in versions}
+        except (ValueError, FileNotFoundError, RuntimeError) as e:
+            typer.secho(f"❌ {e}", fg=typer.colors.RED)
+            raise typer.Exit(code=1)
+        model_bundle = model_bundles[f"v{model_version}"]
+        if probabilities:
+            class_names = model_bundle[1]
+
+        key = cache_key(model_version, engine, variant) if use_cache else None
+        if compare:
+            # The prediction cache is per model and would skip decoding for some
+            # models only, so comparisons always score every image
+            from dermaai_cli.core import comparison
+
+            agreement = comparison.AgreementSummary(model_bundles)
+            results = comparison.run_comparison(
+                model_bundles, image_paths,
+                batch_size=batch_size, num_workers=decode_workers, prefetch=prefetch, profiler=profiler,
+            )
+        elif workers > 1:
+            from dermaai_cli.core import sharding
+
+            threads = threads or sharding.default_threads(workers)
+            typer.echo(f"Scoring with {workers} worker processes x {threads} threads")
+            results = sharding.run_sharded(
+                model_bundle, image_paths, workers, threads,
+                batch_size=batch_size, cache_key=key, probabilities=probabilities,
+            )
+        else:
+            if threads:
+                import torch
+                torch.set_num_threads(threads)
+            cache = PredictionCache(key) if use_cache else None
+            results = inference.run_inference(
+                model_bundle, image_paths, mode,
+                batch_size=batch_size, num_workers=decode_workers, prefetch=prefetch, cache=cache,
+                profiler=profiler, probabilities=probabilities,
+            )
+
+    # Run inference, writing each result as soon as it is scored
+    try:
+        with output.open_writer(
+            output_format, final_output, "agreement" if compare else "prediction", class_names=class_names
+        ) as writer:
+            if resumed:
+                results = resumed.merge(results)  # journaled rows back in input order
+            for result in results:
+                with profiler.stage("write"):
+                    writer.write(result)
+                if journal and result["image"] not in done:
+                    journal.record(result)
+                if agreement:
+                    agreement.add(result)
+            with profiler.stage("write_close"):
+                writer.close()
+    except (client.DaemonError, OSError, ValueError, RuntimeError, sqlite3.Error) as e:
+        typer.secho(f"❌ {e}", fg=typer.colors.RED)
+        raise typer.Exit(code=1)
+    finally:
+        if cache is not None:
+            cache.close()
+            cache_stats = {"hits": cache.hits, "misses": cache.misses}
+        if journal:
+            journal.close()
+
+    # The output is complete, so the journal is no longer needed
+    if journal:
+        journal.remove()
     typer.echo(f"✅ Results saved to {final_output}")
+    if cache_stats:
+        typer.echo(f"Prediction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    if agreement:
+        _report_agreement(agreement)
+
+    if profiler.enabled:
+        profiler.record("total", run_start)
+        _report_profile(profiler, trace)
+
+
+def _report_agreement(agreement, top_changes: int = 5):
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    if not agreement.scored:
+        console.print("No images were scored, nothing to compare.")
+        return
+    console.print(
+        f"All versions agree on {agreement.all_agree}/{agreement.scored} images "
+        f"({agreement.all_agree / agreement.scored * 100:.1f}%)"
+    )
+    table = Table(title=f"Agreement with {agreement.baseline}")
+    table.add_column("Version", style="cyan")
+    table.add_column("Agreement", justify="right")
+    table.add_column(f"Most frequent changes ({agreement.baseline} → version)")
+    for label in agreement.labels[1:]:
+        changes = ", ".join(
+            f"{base} → {pred} ({count})" for (base, pred), count in agreement.changes[label].most_common(top_changes)
+        )
+        table.add_row(label, f"{agreement.rate(label) * 100:.1f}%", changes or "-")
+    console.print(table)
+
+
+# Pipeline order for the profile table; other stages follow
+PROFILE_STAGES = [
+    "ensure_model_exists", "load_model", "cache_lookup", "decode", "transform",
+    "forward", "image", "write", "write_close", "total",
+]
+
+
+def _report_profile(profiler, trace: Path = None):
+    from rich.console import Console
+    from rich.table import Table
+
+    console = Console()
+    torch_profiler = profiler.stop()
+    summary = profiler.summary()
+
+    table = Table(title="Profile (ms; decode/transform are summed over decode threads)")
+    table.add_column("Stage", style="cyan")
+    for column in ("Count", "Total", "Mean", "p50", "p95", "Max"):
+        table.add_column(column, justify="right")
+    for stage in sorted(summary, key=lambda s: PROFILE_STAGES.index(s) if s in PROFILE_STAGES else len(PROFILE_STAGES)):
+        row = summary[stage]
+        table.add_row(
+            stage, str(row["count"]),
+            *(f"{row[k]:.1f}" for k in ("total_ms", "mean_ms", "p50_ms", "p95_ms", "max_ms")),
+        )
+    console.print(table)
+
+    histogram = profiler.histogram("image")
+    if any(count for _, count in histogram):
+        console.print("Per-image latency (decode start → result ready):")
+        widest = max(count for _, count in histogram)
+        lower = 0
+        for bound, count in histogram:
+            if count:
+                label = f"{lower:g}-{bound:g} ms" if bound != float("inf") else f"> {lower:g} ms"
+                console.print(f"  {label:>14} {'█' * max(1, round(30 * count / widest))} {count}")
+            lower = bound
+
+    if trace:
+        profiler.write_chrome_trace(trace)
+        console.print(f"Trace written to {trace} (open in chrome://tracing or ui.perfetto.dev)")
+    if torch_profiler is not None:
+        console.print(torch_profiler.key_averages().table(sort_by="self_cpu_time_total", row_limit=15))
+        if trace:
+            torch_trace = trace.with_name(trace.stem + ".torch.json")
+            torch_profiler.export_chrome_trace(str(torch_trace))
+            console.print(f"Torch profiler trace written to {torch_trace}")
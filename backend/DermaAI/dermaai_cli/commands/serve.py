@@ -0,0 +1,84 @@
+# dermaai_cli/commands/serve.py
+import signal
+import threading
+import typer
+from rich.console import Console
+from rich.table import Table
+from dermaai_cli.core import client, config
+
+app = typer.Typer()
+console = Console()
+
+
+@app.command("serve")
+def serve(
+    host: str = typer.Option(config.DEFAULT_SERVE_HOST, help="Interface to bind (keep it local)"),
+    port: int = typer.Option(config.DEFAULT_SERVE_PORT, help="Port to listen on"),
+    preload: list[int] = typer.Option(None, help="Model versions to load at start-up"),
+    max_models: int = typer.Option(2, min=1, help="Max models kept loaded (least recently used evicted)"),
+    batch_size: int = typer.Option(config.DEFAULT_BATCH_SIZE, min=1, help="Default images per forward pass"),
+    decode_workers: int = typer.Option(config.DEFAULT_DECODE_WORKERS, min=0, help="Decode threads per request"),
+):
+    """
+    Run a local inference daemon that keeps models loaded;
+    'predict run' and the REPL use it automatically while it runs
+    (example command: dermai serve --preload 3)
+    """
+    from dermaai_cli.core import server
+
+    try:
+        daemon = server.InferenceServer(host, port, max_models, batch_size, decode_workers)
+    except OSError as e:
+        console.print(f"[red]Cannot listen on {host}:{port}: {e}[/red]")
+        raise typer.Exit(code=1)
+
+    for version in preload or []:
+        console.print(f"[cyan]Loading model v{version}...[/cyan]")
+        daemon.pool.get(version)
+
+    # Stop cleanly (removing the serve file) on `kill` as well as Ctrl+C.
+    # shutdown() waits for serve_forever to return, so it can't run in the
+    # handler itself (that interrupts serve_forever on this same thread)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=daemon.shutdown, daemon=True).start())
+    daemon.write_serve_file()
+    host, port = daemon.server_address[:2]  # the actual port when --port 0
+    console.print(f"[bold green]DermaAI daemon listening on http://{host}:{port}[/bold green] (Ctrl+C to stop)")
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.remove_serve_file()
+        daemon.server_close()
+        console.print("Daemon stopped.")
+
+
+@app.command("serve-status")
+def serve_status():
+    """
+    Show health and stats of the running daemon
+    (example command: dermai serve-status)
+    """
+    url = client.find_server()
+    if not url:
+        console.print("[yellow]No DermaAI daemon running.[/yellow]")
+        raise typer.Exit(code=1)
+
+    stats = client.stats(url)
+    console.print(f"[green]✔ Daemon at {url}[/green] (up {stats['uptime_s']}s, {stats['errors']} errors)")
+
+    table = Table(title="Loaded Models")
+    table.add_column("Version", style="cyan", justify="center")
+    table.add_column("Engine", style="magenta")
+    table.add_column("Variant", style="green")
+    for m in stats["loaded_models"]:
+        table.add_row(f"v{m['version']}", m["engine"], m["variant"] or "-")
+    console.print(table)
+
+    for endpoint, count in stats["requests"].items():
+        console.print(f"{endpoint}: {count} requests")
+    for model_key, count in stats["images"].items():
+        console.print(f"{model_key}: {count} images")
+    cache = stats.get("cache") or {}
+    if cache.get("hits") or cache.get("misses"):
+        console.print(f"Prediction cache: {cache['hits']} hits, {cache['misses']} misses")
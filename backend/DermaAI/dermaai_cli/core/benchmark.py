@@ -0,0 +1,45 @@
+# dermaai_cli/core/benchmark.py
+import time
+
+import torch
+
+
+def synthetic_batch(batch_size: int, seed: int = 0):
+    """Random normalised (N, 3, 224, 224) batch for offline timing/parity checks"""
+    generator = torch.Generator().manual_seed(seed)
+    return torch.randn(batch_size, 3, 224, 224, generator=generator)
+
+
+def percentile(values, pct: float):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def time_forward(model, batch_size: int = 1, iterations: int = 20, warmup: int = 3, seed: int = 0):
+    """
+    Time model(batch) on a synthetic batch.
+    Returns latency percentiles per batch (ms) and throughput (images/s).
+    """
+    batch = synthetic_batch(batch_size, seed)
+    with torch.no_grad():
+        for _ in range(warmup):
+            model(batch)
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            model(batch)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    total_s = sum(latencies) / 1000
+    return {
+        "batch_size": batch_size,
+        "iterations": iterations,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "mean_ms": sum(latencies) / len(latencies),
+        "images_per_s": batch_size * iterations / total_s if total_s else 0.0,
+    }
@@ -0,0 +1,86 @@
+# dermaai_cli/core/client.py
+# Thin client for the `dermai serve` daemon (stdlib only, so it stays cheap to import)
+import json
+import urllib.error
+import urllib.request
+from itertools import islice
+from pathlib import Path
+
+SERVE_FILE = Path.home() / ".dermai" / "serve.json"
+# Paths sent per /predict request, so huge jobs don't become one giant request
+CHUNK_SIZE = 256
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+def _request(url: str, payload: dict = None, timeout: float = None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as r:
+            return json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        try:
+            message = json.loads(e.read()).get("error", str(e))
+        except ValueError:
+            message = str(e)
+        raise DaemonError(message)
+    except (urllib.error.URLError, OSError) as e:
+        raise DaemonError(f"Daemon unreachable: {e}")
+
+
+def find_server(timeout: float = 0.5):
+    """Base URL of a running daemon, or None (no serve file, or it doesn't answer /health)"""
+    try:
+        info = json.loads(SERVE_FILE.read_text())
+        url = f"http://{info['host']}:{info['port']}"
+    except (OSError, ValueError, KeyError):
+        return None
+    try:
+        _request(f"{url}/health", timeout=timeout)
+    except DaemonError:
+        return None
+    return url
+
+
+def health(url: str):
+    return _request(f"{url}/health", timeout=5)
+
+
+def stats(url: str):
+    return _request(f"{url}/stats", timeout=5)
+
+
+def load(url: str, model_version: int, engine: str = "torch", variant: str = None):
+    """Ask the daemon to load a model ahead of the first prediction"""
+    return _request(f"{url}/load", {"model_version": model_version, "engine": engine, "variant": variant})
+
+
+def predict(url: str, image_paths, model_version: int, engine: str = "torch",
+            variant: str = None, batch_size: int = None, use_cache: bool = True, cache_stats: dict = None):
+    """
+    Score images through the daemon, yielding results like inference.run_inference.
+    Prediction cache hits/misses are added to cache_stats if given.
+    """
+    image_paths = iter(image_paths)
+    while True:
+        chunk = list(islice(image_paths, CHUNK_SIZE))
+        if not chunk:
+            break
+        response = _request(f"{url}/predict", {
+            "model_version": model_version,
+            "engine": engine,
+            "variant": variant,
+            "batch_size": batch_size,
+            "use_cache": use_cache,
+            # The daemon has its own working directory
+            "images": [str(Path(p).absolute()) for p in chunk],
+        })
+        for path, result in zip(chunk, response["results"]):
+            result["image"] = str(path)  # report paths as the caller gave them
+            yield result
+        if cache_stats is not None:
+            for k, v in response.get("cache", {}).items():
+                cache_stats[k] = cache_stats.get(k, 0) + v
@@ -0,0 +1,89 @@
+# dermaai_cli/core/comparison.py
+# Scoring one image stream with several model versions at once: each image is
+# decoded and transformed once and the same batch tensor goes to every model.
+from collections import Counter, deque
+from functools import partial
+
+import torch
+
+from dermaai_cli.core import inference
+from dermaai_cli.core.config import DEFAULT_BATCH_SIZE, DEFAULT_DECODE_WORKERS
+from dermaai_cli.core.profiler import NULL_PROFILER
+
+
+def run_comparison(model_bundles: dict, image_paths, batch_size=DEFAULT_BATCH_SIZE,
+                   num_workers=DEFAULT_DECODE_WORKERS, prefetch=None, profiler=NULL_PROFILER):
+    """
+    Like inference.run_inference for several models: model_bundles maps a label
+    (e.g. "v3") to a (model, class_names) bundle. Yields, in input order,
+    {"image", "prediction_<label>", "confidence_<label>", ..., "agreement"}
+    where agreement is "agree", "disagree" or "missing" (file not found).
+    """
+    batch_size = max(1, int(batch_size))
+    if prefetch is None:
+        prefetch = 2 * batch_size
+    ordered = deque()  # rows in input order; complete once "agreement" is set
+    pending = []  # (row, tensor, load start)
+
+    def flush():
+        batch = torch.stack([tensor for _, tensor, _ in pending])
+        for label, (model, class_names) in model_bundles.items():
+            with profiler.forward(len(pending)):
+                predictions = inference.predict_batch(model, batch, class_names)
+            for (row, _, _), (pred, conf) in zip(pending, predictions):
+                row[f"prediction_{label}"] = pred
+                row[f"confidence_{label}"] = round(conf, 4)
+        for row, _, start in pending:
+            labels = {row[f"prediction_{label}"] for label in model_bundles}
+            row["agreement"] = "agree" if len(labels) == 1 else "disagree"
+            profiler.record("image", start)
+        pending.clear()
+
+    loader = partial(inference._prepare, profiler=profiler)
+    for img_path, prepared in inference.iter_preprocessed(image_paths, num_workers, prefetch, loader):
+        row = {"image": str(img_path)}
+        ordered.append(row)
+        if prepared is None:
+            for label in model_bundles:
+                row[f"prediction_{label}"] = "❌ File not found"
+                row[f"confidence_{label}"] = 0
+            row["agreement"] = "missing"
+        else:
+            start, tensor, _, _ = prepared
+            pending.append((row, tensor, start))
+            if len(pending) >= batch_size:
+                flush()
+        while ordered and "agreement" in ordered[0]:
+            yield ordered.popleft()
+
+    if pending:
+        flush()
+    yield from ordered
+
+
+class AgreementSummary:
+    """Running agreement of every version with the first (baseline) version"""
+
+    def __init__(self, labels):
+        self.labels = list(labels)
+        self.baseline = self.labels[0]
+        self.scored = 0
+        self.all_agree = 0
+        self.matches = Counter()  # label -> images predicted like the baseline
+        self.changes = {label: Counter() for label in self.labels[1:]}  # (baseline, label) prediction pairs
+
+    def add(self, row: dict):
+        if row.get("agreement") == "missing":
+            return
+        self.scored += 1
+        self.all_agree += row.get("agreement") == "agree"
+        base = row[f"prediction_{self.baseline}"]
+        for label in self.labels[1:]:
+            pred = row[f"prediction_{label}"]
+            if pred == base:
+                self.matches[label] += 1
+            else:
+                self.changes[label][(base, pred)] += 1
+
+    def rate(self, label):
+        return self.matches[label] / self.scored if self.scored else 0.0
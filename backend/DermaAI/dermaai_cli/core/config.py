@@ -0,0 +1,26 @@
+# dermaai_cli/core/config.py
+# Shared defaults. Kept free of heavy imports (torch, pandas, ...) so the CLI
+# can build its commands and --help without loading them.
+import os
+
+# Inference backends: eager PyTorch or ONNX Runtime (CPU)
+ENGINES = ("torch", "onnx")
+# Image files picked up when scanning folders
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+# Images per forward pass in run_inference
+DEFAULT_BATCH_SIZE = 16
+# Threads decoding/transforming images ahead of the forward pass
+DEFAULT_DECODE_WORKERS = min(4, os.cpu_count() or 1)
+
+# Local inference daemon (dermai serve)
+DEFAULT_SERVE_HOST = "127.0.0.1"
+DEFAULT_SERVE_PORT = 8765
+
+
+def model_key(version: int, engine: str = "torch", variant: str = None, fingerprint: str = None):
+    """
+    Identifies what produced a prediction, e.g. v3/torch or v3/torch/int8;
+    with a fingerprint of the files loaded, v3/torch@1f2e3d4c5b6a
+    """
+    key = f"v{version}/{engine}" + (f"/{variant}" if variant else "")
+    return key + (f"@{fingerprint}" if fingerprint else "")
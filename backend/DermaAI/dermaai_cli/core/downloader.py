@@ -0,0 +1,193 @@
+# dermaai_cli/core/downloader.py
+# Parallel HTTP range downloads into <dest>.part with a small JSON state file,
+# so an interrupted download resumes with only the missing ranges. The file
+# is checked against its published sha256 before being renamed into place.
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CONNECTIONS = 4
+# Bytes per range request, and per read from the socket / disk
+PART_SIZE = 8 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+TIMEOUT_S = 30
+
+
+class ChecksumError(RuntimeError):
+    pass
+
+
+def _session(connections):
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_maxsize=connections))
+    session.mount("http://", HTTPAdapter(pool_maxsize=connections))
+    return session
+
+
+def file_sha256(path: Path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def fetch_digest(url: str, session=None):
+    """Published sha256 for url (<url>.sha256, sha256sum format), or None if there is none"""
+    session = session or requests
+    r = session.get(url + ".sha256", timeout=TIMEOUT_S)
+    if r.status_code in (403, 404):  # S3 answers 403 for missing public keys
+        return None
+    r.raise_for_status()
+    return r.text.split()[0].lower()
+
+
+def _load_state(path: Path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _save_state(path: Path, state: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def _ranges(size, part_size):
+    return [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+
+
+def _fetch_range(session, url, part_path, start, end, progress):
+    r = session.get(url, headers={"Range": f"bytes={start}-{end}"}, stream=True, timeout=TIMEOUT_S)
+    with r:
+        r.raise_for_status()
+        if r.status_code != 206:
+            raise RuntimeError(f"Server ignored range request for {url}")
+        written = 0
+        with open(part_path, "r+b") as f:
+            f.seek(start)
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                written += len(chunk)
+                if progress is not None:
+                    progress.update(len(chunk))
+    if written != end - start + 1:
+        raise RuntimeError(f"Short read for bytes {start}-{end} of {url}")
+
+
+def _validators(headers):
+    return {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "size": int(headers.get("Content-Length", 0)),
+    }
+
+
+def remote_info(url: str, etag=None, last_modified=None, session=None):
+    """
+    Conditional HEAD: None if the remote file still matches etag/last_modified,
+    otherwise its current {"etag", "last_modified", "size"}.
+    """
+    session = session or requests
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    elif last_modified:
+        headers["If-Modified-Since"] = last_modified
+    r = session.head(url, headers=headers, allow_redirects=True, timeout=TIMEOUT_S)
+    if r.status_code == 304:
+        return None
+    r.raise_for_status()
+    info = _validators(r.headers)
+    if etag and info["etag"] == etag:  # server ignored the condition
+        return None
+    return info
+
+
+def _download_ranges(session, url, part_path, state_path, size, etag, connections, part_size, progress):
+    state = _load_state(state_path)
+    if not (state and state.get("url") == url and state.get("size") == size
+            and state.get("etag") == etag and part_path.exists()):
+        # Nothing usable to resume from: start a fresh, pre-sized .part file
+        state = {"url": url, "size": size, "etag": etag, "part_size": part_size, "done": []}
+        with open(part_path, "wb") as f:
+            f.truncate(size)
+        _save_state(state_path, state)
+
+    ranges = _ranges(size, state["part_size"])
+    done = set(state["done"])
+    if progress is not None:
+        progress.update(sum(end - start + 1 for i, (start, end) in enumerate(ranges) if i in done))
+
+    lock = threading.Lock()
+
+    def fetch(i):
+        start, end = ranges[i]
+        _fetch_range(session, url, part_path, start, end, progress)
+        with lock:  # record finished ranges so a restart skips them
+            state["done"].append(i)
+            _save_state(state_path, state)
+
+    pending = [i for i in range(len(ranges)) if i not in done]
+    with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="dermai-download") as pool:
+        for future in [pool.submit(fetch, i) for i in pending]:
+            future.result()
+
+
+def _download_stream(session, url, part_path, progress):
+    with session.get(url, stream=True, timeout=TIMEOUT_S) as r:
+        r.raise_for_status()
+        with open(part_path, "wb") as f:
+            for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                if progress is not None:
+                    progress.update(len(chunk))
+
+
+def download(url: str, dest: Path, connections=DEFAULT_CONNECTIONS, part_size=PART_SIZE,
+             sha256=None, verify=True, progress=None):
+    """
+    Download url to dest; returns {"sha256", "etag", "last_modified", "size"} for revalidation.
+    sha256: expected digest; when None (and verify) the published <url>.sha256 is used if present.
+    progress: optional tqdm-like bar; its total is set once the size is known.
+    """
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part_path = dest.with_name(dest.name + ".part")
+    state_path = dest.with_name(dest.name + ".part.json")
+
+    with _session(connections) as session:
+        if verify and sha256 is None:
+            sha256 = fetch_digest(url, session)
+
+        head = session.head(url, allow_redirects=True, timeout=TIMEOUT_S)
+        head.raise_for_status()
+        info = _validators(head.headers)
+        size = info["size"]
+        if progress is not None and size:
+            progress.total = size
+        if head.headers.get("Accept-Ranges") == "bytes" and size > 0:
+            _download_ranges(session, url, part_path, state_path, size,
+                             info["etag"], max(1, connections), part_size, progress)
+        else:
+            _download_stream(session, url, part_path, progress)
+
+    actual = file_sha256(part_path)
+    if verify and sha256 and actual != sha256.lower():
+        part_path.unlink(missing_ok=True)
+        state_path.unlink(missing_ok=True)
+        raise ChecksumError(f"Checksum mismatch for {url}: expected {sha256}, got {actual}")
+
+    os.replace(part_path, dest)
+    state_path.unlink(missing_ok=True)
+    return dict(info, sha256=actual, size=dest.stat().st_size)
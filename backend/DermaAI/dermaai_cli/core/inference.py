@@ -1,12 +1,17 @@
 # dermaai_cli/core/inference.py
 import torch
-import torch.nn as nn
-from torchvision.models import resnet18
 from torchvision import transforms
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 from pathlib import Path
-import os
-import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import io
+from dermaai_cli.core.onnx_engine import OnnxModel, onnx_path_for
+from dermaai_cli.core import quantization, weights
+from dermaai_cli.core.prediction_cache import content_digest
+from dermaai_cli.core.profiler import NULL_PROFILER
+from dermaai_cli.core.config import ENGINES, DEFAULT_BATCH_SIZE, DEFAULT_DECODE_WORKERS
 
 # === Preprocessing (same as training) ===
 transform = transforms.Compose([
@@ -24,38 +29,206 @@ def load_labels(labels_path: Path):
         return [line.strip() for line in f.readlines()]
 
 
-def load_model(model_path: Path, labels_path: Path):
-    """Load trained ResNet18 model from .pth file"""
+def load_model(model_path: Path, labels_path: Path, engine: str = "torch",
+               quantization_mode: str = None, qengine: str = None):
+    """
+    Load trained ResNet18 model from .pth file (or the ONNX graph exported next to it).
+    A .safetensors converted next to the .pth is used instead when present (faster, memory-mapped).
+    quantization_mode ("static"/"dynamic") loads model_path as an int8 variant instead.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}. Choose one of: {', '.join(ENGINES)}")
     class_names = load_labels(labels_path)
     num_classes = len(class_names)
 
-    model = resnet18(weights=None)
-    model.fc = nn.Linear(model.fc.in_features, num_classes)
-    model.load_state_dict(torch.load(model_path, map_location="cpu"))
-    model.eval()
-    return model, class_names
+    if engine == "onnx":
+        return OnnxModel(onnx_path_for(model_path)), class_names
+    if quantization_mode:
+        return quantization.load_quantized(model_path, num_classes, quantization_mode, qengine), class_names
+
+    state_dict = weights.load_state_dict(weights.resolve_weights(model_path))
+    return weights.build_resnet18(state_dict, num_classes), class_names
+
+
+# Large images are decoded/reduced to no less than this before the 224x224
+# resize (2x keeps the resize antialiased like a full-resolution decode)
+DECODE_SIZE = (448, 448)
+
+
+def open_image(image_path):
+    """
+    Open an image as RGB, decoded close to DECODE_SIZE: JPEGs are scaled by
+    1/2, 1/4 or 1/8 inside the decoder (draft), other formats are box-reduced.
+    """
+    image = Image.open(image_path)
+    if image.format == "JPEG":
+        image.draft("RGB", DECODE_SIZE)
+    image = image.convert("RGB")
+    factor = min(image.width // DECODE_SIZE[0], image.height // DECODE_SIZE[1])
+    if factor >= 2:  # non-JPEG, or a JPEG still larger than 8x DECODE_SIZE
+        image = image.reduce(factor)
+    return image
+
+
+def preprocess_image(image_path: Path, profiler=NULL_PROFILER):
+    """Decode an image and apply the training transform (no batch dimension)"""
+    with profiler.stage("decode"):
+        image = open_image(image_path)
+    with profiler.stage("transform"):
+        return transform(image)
+
+
+def batch_probabilities(model, batch):
+    """(N, num_classes) softmax probabilities of a batch in a single forward pass"""
+    with torch.no_grad():
+        return torch.softmax(model(batch), dim=1)
+
+
+def top1(probs, class_names: list[str]):
+    """[(class name, confidence)] for each row of a probability matrix"""
+    confidences, pred_idxs = probs.max(dim=1)
+    return [(class_names[idx], conf) for idx, conf in zip(pred_idxs.tolist(), confidences.tolist())]
+
+
+def predict_batch(model, batch, class_names: list[str]):
+    """Predict a stacked (N, 3, 224, 224) batch in a single forward pass"""
+    return top1(batch_probabilities(model, batch), class_names)
 
 
 def predict_image(model, image_path: Path, class_names: list[str]):
     """Predict a single image"""
-    image = Image.open(image_path).convert("RGB")
-    input_tensor = transform(image).unsqueeze(0)  # Add batch dimension
-    with torch.no_grad():
-        outputs = model(input_tensor)
-        probs = torch.softmax(outputs, dim=1)[0]
-        pred_idx = torch.argmax(probs).item()
-        confidence = probs[pred_idx].item()
-    return class_names[pred_idx], confidence
+    input_tensor = preprocess_image(image_path).unsqueeze(0)  # Add batch dimension
+    return predict_batch(model, input_tensor, class_names)[0]
+
+
+def _load_tensor(image_path):
+    """Preprocess an image, or None if the file does not exist"""
+    if not Path(image_path).exists():
+        return None
+    return preprocess_image(image_path)
+
+
+def _prepare(image_path, cache=None, profiler=NULL_PROFILER):
+    """
+    (start, tensor, digest, cached) for an image, or None if the file does not exist.
+    With a cache the file is hashed first and a hit skips decoding (tensor is None).
+    start is the profiler clock when loading began (0 when not profiling).
+    """
+    start = profiler.clock()
+    if not Path(image_path).exists():
+        return None
+    if cache is None:
+        return start, preprocess_image(image_path, profiler), None, None
+    with profiler.stage("cache_lookup"):
+        data = Path(image_path).read_bytes()
+        digest = content_digest(data)
+        cached = cache.get(digest)
+    if cached is not None:
+        return start, None, digest, cached
+    try:
+        tensor = preprocess_image(io.BytesIO(data), profiler)
+    except UnidentifiedImageError as e:  # PIL would name the BytesIO, not the file
+        raise UnidentifiedImageError(f"cannot identify image file {str(image_path)!r}") from e
+    except OSError as e:
+        raise OSError(f"{image_path}: {e}") from e
+    return start, tensor, digest, None
 
 
-def run_inference(model_bundle, image_paths, mode="offline"):
-    """Run inference on multiple images"""
+def iter_preprocessed(image_paths, num_workers=DEFAULT_DECODE_WORKERS, prefetch=None, loader=_load_tensor):
+    """
+    Yield (image_path, loader(image_path)) in input order; with the default
+    loader that is the tensor, or None for missing files.
+    Up to `prefetch` images are decoded ahead by `num_workers` threads, so PIL
+    decode and the transform overlap with whatever the caller does in between.
+    """
+    if num_workers < 1:
+        for img_path in image_paths:
+            yield img_path, loader(img_path)
+        return
+
+    prefetch = max(1, prefetch or 2 * num_workers)
+    window = deque()  # bounded queue of in-flight/ready tensors
+    with ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="dermai-decode") as pool:
+        try:
+            for img_path in image_paths:
+                window.append((img_path, pool.submit(loader, img_path)))
+                if len(window) >= prefetch:
+                    ready_path, future = window.popleft()
+                    yield ready_path, future.result()
+            while window:
+                ready_path, future = window.popleft()
+                yield ready_path, future.result()
+        finally:
+            # Consumer stopped early (or failed): drop work that hasn't started
+            for _, future in window:
+                future.cancel()
+
+
+def run_inference(model_bundle, image_paths, mode="offline", batch_size=DEFAULT_BATCH_SIZE,
+                  num_workers=DEFAULT_DECODE_WORKERS, prefetch=None, cache=None, profiler=NULL_PROFILER,
+                  probabilities=False):
+    """
+    Run inference on an iterable of image paths (consumed lazily), yielding
+    result dicts in input order as soon as each image's batch is scored,
+    batch_size images per forward pass.
+    Decoding runs on num_workers threads, keeping up to prefetch tensors
+    (default: two batches) ready while the model runs.
+    With a PredictionCache, images already scored by this model are not decoded or run again.
+    A Profiler records decode/transform/forward stages and each image's latency
+    from the start of its decode until its result is ready.
+    With probabilities, results also carry "probabilities": every class's
+    softmax probability (float32 values, in class_names order; None for missing
+    files). Cached results have no probabilities, so don't combine it with a cache.
+    """
     model, class_names = model_bundle
-    results = []
-    for img_path in image_paths:
-        if not Path(img_path).exists():
-            results.append({"image": str(img_path), "prediction": "❌ File not found", "confidence": 0})
-            continue
-        pred, conf = predict_image(model, img_path, class_names)
-        results.append({"image": str(img_path), "prediction": pred, "confidence": round(conf, 4)})
-    return results
+    batch_size = max(1, int(batch_size))
+    if prefetch is None:
+        prefetch = 2 * batch_size
+    ordered = deque()  # results in input order; {} until the image's batch is scored
+    pending = []  # (result placeholder, image path, tensor, content digest, load start)
+
+    def flush():
+        batch = torch.stack([tensor for _, _, tensor, _, _ in pending])
+        with profiler.forward(len(pending)):
+            probs = batch_probabilities(model, batch)
+            predictions = top1(probs, class_names)
+        prob_rows = probs.float().tolist() if probabilities else None
+        scored = []
+        for i, ((result, img_path, _, digest, start), (pred, conf)) in enumerate(zip(pending, predictions)):
+            result.update({"image": str(img_path), "prediction": pred, "confidence": round(conf, 4)})
+            if probabilities:
+                result["probabilities"] = prob_rows[i]
+            scored.append((digest, pred, round(conf, 4)))
+            profiler.record("image", start)
+        if cache is not None:
+            cache.put_many(scored)
+        pending.clear()
+
+    loader = partial(_prepare, cache=cache, profiler=profiler)
+    try:
+        for img_path, prepared in iter_preprocessed(image_paths, num_workers, prefetch, loader):
+            if prepared is None:
+                missing = {"image": str(img_path), "prediction": "❌ File not found", "confidence": 0}
+                if probabilities:
+                    missing["probabilities"] = None
+                ordered.append(missing)
+            elif prepared[3] is not None:
+                pred, conf = prepared[3]
+                ordered.append({"image": str(img_path), "prediction": pred, "confidence": conf})
+                profiler.record("image", prepared[0])
+            else:
+                start, tensor, digest, _ = prepared
+                result = {}
+                ordered.append(result)
+                pending.append((result, img_path, tensor, digest, start))
+                if len(pending) >= batch_size:
+                    flush()
+            while ordered and ordered[0]:
+                yield ordered.popleft()
+
+        if pending:
+            flush()
+        yield from ordered
+    finally:
+        if cache is not None:
+            cache.flush()
@@ -0,0 +1,112 @@
+# dermaai_cli/core/jobs.py
+import json
+from collections import deque
+from pathlib import Path
+
+# Prediction of an image whose file doesn't exist (any column of a comparison row)
+FILE_NOT_FOUND = "❌ File not found"
+
+
+def journal_path_for(output_file: Path):
+    """results.csv -> results.csv.journal"""
+    output_file = Path(output_file)
+    return output_file.with_name(output_file.name + ".journal")
+
+
+class JobJournal:
+    """
+    Append-only checkpoint of completed results for a predict run (JSON Lines).
+    The first line records which model produced them, so a resume can't mix models.
+    """
+
+    def __init__(self, path: Path, model_key: str):
+        self.path = Path(path)
+        self.model_key = model_key
+        self._file = None
+
+    def load(self):
+        """Completed results from a previous run, keyed by image path"""
+        if not self.path.exists():
+            return {}
+        done = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for n, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # torn last line from an interrupted write
+                if n == 0:
+                    if record.get("model") != self.model_key:
+                        raise ValueError(
+                            f"Journal {self.path} was written by model {record.get('model')}, "
+                            f"not {self.model_key}. Re-run without --resume to start over."
+                        )
+                    continue
+                if not _file_missing(record):  # journals written before these were skipped
+                    done[record["image"]] = record
+        return done
+
+    def open(self, resume: bool = False):
+        """Start appending; without resume any previous journal is discarded"""
+        if resume and self.path.exists():
+            self._rewrite_valid_lines()
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(json.dumps({"model": self.model_key}) + "\n")
+            self._file.flush()
+        return self
+
+    def record(self, result: dict):
+        if _file_missing(result):
+            return  # not a finished image: a resume looks for the file again
+        self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self._file.flush()  # each completed image survives a crash
+
+    def close(self):
+        if self._file and not self._file.closed:
+            self._file.close()
+
+    def remove(self):
+        self.close()
+        self.path.unlink(missing_ok=True)
+
+    def _rewrite_valid_lines(self):
+        """Drop a torn trailing line so appended records start on a fresh line"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.readlines()
+        if lines and not lines[-1].endswith("\n"):
+            with open(self.path, "w", encoding="utf-8") as f:
+                f.writelines(lines[:-1])
+
+
+def _file_missing(result: dict):
+    return FILE_NOT_FOUND in result.values()
+
+
+class ResumedRun:
+    """
+    Splits the input of a resumed run into journaled and still-to-score images,
+    then merges both back into input order.
+    """
+
+    def __init__(self, done: dict):
+        self.done = done
+        self._order = deque()  # input paths handed out and not yet merged
+
+    def remaining(self, image_paths):
+        """The images to score (lazily; the order is recorded as they are read)"""
+        for path in image_paths:
+            self._order.append(str(path))
+            if str(path) not in self.done:
+                yield path
+
+    def merge(self, results):
+        """results (one per image from remaining(), in order) with the journaled rows put back in place"""
+        for result in results:
+            while self._order[0] in self.done:
+                yield self.done[self._order.popleft()]
+            self._order.popleft()
+            yield result
+        while self._order:  # journaled images after the last scored one
+            yield self.done[self._order.popleft()]
@@ -1,10 +1,13 @@
 # dermaai_cli/core/model_manager.py
+import contextlib
+import copy
 import json
-import requests
+import os
 from pathlib import Path
+import re
 import shutil
 import datetime
-from tqdm import tqdm
+import time
 
 # Where models are stored locally for all machines
 MODELS_DIR = Path.home() / ".dermai" / "models"
@@ -14,24 +17,95 @@ INDEX_FILE = MODELS_DIR / "model_index.json"
 LOCAL_DEV_MODELS_DIR = Path(__file__).parents[2] / "model"
 S3_BASE_URL = "https://dermaai-model-classes-bucket.s3.amazonaws.com"
 
-print(LOCAL_DEV_MODELS_DIR)
-
+# Cached listing of model versions published in the bucket
+REMOTE_VERSIONS_FILE = Path.home() / ".dermai" / "remote_versions.json"
+REMOTE_VERSIONS_TTL_S = 6 * 3600
 
 
 # -------------------------------
 # Index helpers
 # -------------------------------
+# Several dermai processes may share one index: updates take an exclusive lock on
+# model_index.json.lock and replace the file atomically, so readers never see a
+# half-written index. Reads are cached until the file's mtime/size/inode change.
+_index_cache = {"stat": None, "index": None}
+
+
+@contextlib.contextmanager
+def _index_lock():
+    MODELS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(INDEX_FILE.with_name(INDEX_FILE.name + ".lock"), "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK gives up after ~10s; keep waiting
+                    pass
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _index_stat():
+    try:
+        st = INDEX_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return (str(INDEX_FILE), st.st_mtime_ns, st.st_size, st.st_ino)
+
+
 def _load_index():
-    if not INDEX_FILE.exists():
+    stat = _index_stat()
+    if stat is None:
         return {"installed_models": []}
-    with open(INDEX_FILE, "r") as f:
-        return json.load(f)
+    if _index_cache["stat"] != stat:
+        with open(INDEX_FILE, "r") as f:
+            _index_cache["index"] = json.load(f)
+        _index_cache["stat"] = stat
+    # Callers modify what they get back, so never hand out the cached object
+    return copy.deepcopy(_index_cache["index"])
 
 
 def _save_index(index):
+    """Atomically replace the index; call while holding _index_lock()"""
     MODELS_DIR.mkdir(parents=True, exist_ok=True)
-    with open(INDEX_FILE, "w") as f:
+    tmp = INDEX_FILE.with_name(f"{INDEX_FILE.name}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
         json.dump(index, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, INDEX_FILE)
+    _index_cache["stat"] = _index_stat()
+    _index_cache["index"] = copy.deepcopy(index)
+
+
+def _update_index(update):
+    """Read-modify-write the index under the lock; update(index) returns True if it changed it"""
+    with _index_lock():
+        index = _load_index()
+        changed = update(index)
+        if changed:
+            _save_index(index)
+        return changed
+
+
+def _find_model(index, version: int):
+    for m in index["installed_models"]:
+        if m["version"] == version:
+            return m
+    raise ValueError(f"Model v{version} not found")
 
 
 # -------------------------------
@@ -42,21 +116,68 @@ def list_models():
     return index.get("installed_models", [])
 
 
+def is_installed(version: int):
+    return any(m["version"] == version for m in list_models())
+
+
 def add_model(version: int, path: str, metadata: dict):
-    index = _load_index()
-    if not any(m["version"] == version for m in index["installed_models"]):
+    def update(index):
+        if any(m["version"] == version for m in index["installed_models"]):
+            return False
         index["installed_models"].append({
             "version": version,
             "path": str(path),
             "metadata": metadata
         })
-        _save_index(index)
+        return True
+
+    _update_index(update)
+
+
+def update_model_metadata(version: int, **fields):
+    """Merge fields into an installed model's metadata"""
+    result = {}
+
+    def update(index):
+        metadata = _find_model(index, version).setdefault("metadata", {})
+        metadata.update(fields)
+        result.update(metadata)
+        return True
+
+    _update_index(update)
+    return result
+
+
+def add_model_variant(version: int, variant: str, info: dict):
+    """Register a derived artifact (e.g. int8) of an installed model under metadata["variants"]"""
+    def update(index):
+        _find_model(index, version).setdefault("metadata", {}).setdefault("variants", {})[variant] = info
+        return True
+
+    _update_index(update)
+
+
+def get_model_variant(version: int, variant: str):
+    for m in list_models():
+        if m["version"] == version:
+            variants = m.get("metadata", {}).get("variants", {})
+            if variant not in variants:
+                raise ValueError(
+                    f"Model v{version} has no '{variant}' variant. "
+                    f"Available: {', '.join(variants) or 'none'}"
+                )
+            return variants[variant]
+    raise ValueError(f"Model v{version} not found")
 
 
 # -------------------------------
 # Model management
 # -------------------------------
 def download_model(version: int):
+    # Only needed when downloading; keeps `dermai get-models` etc. fast to start
+    from tqdm import tqdm
+    from dermaai_cli.core import downloader
+
     MODELS_DIR.mkdir(parents=True, exist_ok=True)
     model_path = MODELS_DIR / f"dermai_model_v{version}.pth"
     labels_path = MODELS_DIR / f"classes_v{version}.txt"
@@ -65,24 +186,17 @@ def download_model(version: int):
     model_url = f"{S3_BASE_URL}/dermai_model_v{version}.pth"
     print(f"Downloading model v{version} from S3...")
 
-    # Download model with progress
+    # Parallel range download into a .part file, verified and renamed into place;
+    # an interrupted download resumes from the ranges already on disk
     try:
-        with requests.get(model_url, stream=True) as r:
-            r.raise_for_status()
-            total_size = int(r.headers.get('content-length', 0))
-            chunk_size = 8192
-            with open(model_path, "wb") as f, tqdm(
-                total=total_size, unit='B', unit_scale=True, desc="Model"
-            ) as progress:
-                for chunk in r.iter_content(chunk_size=chunk_size):
-                    f.write(chunk)
-                    progress.update(len(chunk))
+        with tqdm(unit='B', unit_scale=True, desc="Model") as progress:
+            model_info = downloader.download(model_url, model_path, progress=progress)
 
         # Download classes file (usually small, so no progress needed)
-        r = requests.get(f"{S3_BASE_URL}/classes_v{version}.txt")
-        r.raise_for_status()
-        labels_path.write_text(r.text)
+        labels_info = downloader.download(f"{S3_BASE_URL}/{labels_path.name}", labels_path, connections=1)
 
+    except downloader.ChecksumError:
+        raise
     except Exception as e:
         raise RuntimeError(f"Failed to download model from S3 URL: {e}")
 
@@ -93,13 +207,111 @@ def download_model(version: int):
         "num_classes": len(classes),
         "classes_file": str(labels_path),
         "train_date": "2025-08-25",
-        "accuracy": 0.75
+        "accuracy": 0.75,
+        "sha256": model_info["sha256"],
+        # ETag/size per file, used by sync_model to revalidate instead of re-downloading
+        "artifacts": {model_path.name: model_info, labels_path.name: labels_info},
     }
 
     add_model(version, model_path, metadata)
+    # A re-download of an already indexed model still refreshes its records
+    update_model_metadata(version, sha256=metadata["sha256"], artifacts=metadata["artifacts"])
     return model_path, labels_path
 
 
+def _artifact_names(version: int):
+    return [f"dermai_model_v{version}.pth", f"classes_v{version}.txt"]
+
+
+def _adopt_artifact(url: str, path: Path):
+    """Remote info for a local file installed without a record, if it matches the published digest"""
+    from dermaai_cli.core import downloader
+
+    published = downloader.fetch_digest(url)
+    if published and path.exists() and downloader.file_sha256(path) == published:
+        info = downloader.remote_info(url)
+        return dict(info, sha256=published)
+    return None
+
+
+def sync_model(version: int):
+    """
+    Revalidate an installed model's files against the bucket with conditional
+    requests and re-fetch only the ones that changed.
+    Returns {file name: "unchanged" | "updated"}.
+    """
+    from dermaai_cli.core import downloader
+
+    installed = next((m for m in list_models() if m["version"] == version), None)
+    if installed is None:
+        raise ValueError(f"Model v{version} not found")
+    artifacts = dict(installed.get("metadata", {}).get("artifacts", {}))
+
+    status = {}
+    try:
+        for name in _artifact_names(version):
+            url = f"{S3_BASE_URL}/{name}"
+            path = MODELS_DIR / name
+            record = artifacts.get(name)
+            if record is None:
+                record = _adopt_artifact(url, path)
+                if record:
+                    artifacts[name] = record
+            if record and path.exists() and path.stat().st_size == record.get("size"):
+                if downloader.remote_info(url, record.get("etag"), record.get("last_modified")) is None:
+                    status[name] = "unchanged"
+                    continue
+            artifacts[name] = downloader.download(url, path)
+            status[name] = "updated"
+    except downloader.ChecksumError:
+        raise
+    except Exception as e:
+        raise RuntimeError(f"Failed to sync model v{version} with S3: {e}")
+
+    model_name = _artifact_names(version)[0]
+    update_model_metadata(version, artifacts=artifacts, sha256=artifacts[model_name].get("sha256"))
+    if status[model_name] == "updated":
+        # Cached predictions were made by the old weights
+        from dermaai_cli.core import prediction_cache
+        prediction_cache.forget_model(version)
+    return status
+
+
+def list_remote_versions(refresh: bool = False, ttl: float = REMOTE_VERSIONS_TTL_S):
+    """Model versions published in the bucket (listing cached on disk for ttl seconds)"""
+    if not refresh and REMOTE_VERSIONS_FILE.exists():
+        with open(REMOTE_VERSIONS_FILE, "r") as f:
+            cached = json.load(f)
+        if time.time() - cached.get("fetched_at", 0) < ttl:
+            return cached["versions"]
+
+    import requests
+    import xml.etree.ElementTree as ET
+
+    keys = []
+    params = {"list-type": "2", "prefix": "dermai_model_v"}
+    try:
+        while True:
+            r = requests.get(f"{S3_BASE_URL}/", params=params, timeout=30)
+            r.raise_for_status()
+            root = ET.fromstring(r.content)
+            ns = {"s3": root.tag.split("}")[0].strip("{")} if root.tag.startswith("{") else {}
+            prefix = "s3:" if ns else ""
+            keys += [k.text for k in root.iterfind(f".//{prefix}Contents/{prefix}Key", ns)]
+            token = root.find(f"{prefix}NextContinuationToken", ns)
+            if token is None:
+                break
+            params["continuation-token"] = token.text
+    except Exception as e:
+        raise RuntimeError(f"Failed to list models in S3: {e}")
+
+    versions = sorted({int(m.group(1)) for k in keys if (m := re.fullmatch(r"dermai_model_v(\d+)\.pth", k))})
+    REMOTE_VERSIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(REMOTE_VERSIONS_FILE, "w") as f:
+        json.dump({"fetched_at": time.time(), "versions": versions}, f)
+    return versions
+
+
 def ensure_model_exists(version: int, local_dev=False):
     model_filename = f"dermai_model_v{version}.pth"
     classes_filename = f"classes_v{version}.txt"
@@ -138,6 +350,11 @@ def ensure_model_exists(version: int, local_dev=False):
         print("[DEBUG] Model or classes not found in MODELS_DIR. Downloading...")
         return download_model(version)
 
+    # Hot path: already indexed, so no classes read and no index write
+    if is_installed(version):
+        print(f"[DEBUG] Model v{version} already exists in MODELS_DIR.")
+        return model_path, classes_path
+
     # Ensure metadata exists in index
     metadata = {
         "version": version,
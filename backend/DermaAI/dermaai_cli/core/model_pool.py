@@ -0,0 +1,93 @@
+# dermaai_cli/core/model_pool.py
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from dermaai_cli.core import inference, model_manager, weights
+from dermaai_cli.core.config import model_key
+from dermaai_cli.core.onnx_engine import onnx_path_for
+from dermaai_cli.core.prediction_cache import file_fingerprint
+from dermaai_cli.core.profiler import NULL_PROFILER
+
+
+def load_bundle(version: int, engine: str = "torch", variant: str = None, profiler=NULL_PROFILER):
+    """Resolve an installed model (downloading it if needed) and load (model, class_names)"""
+    with profiler.stage("ensure_model_exists"):
+        model_path, labels_path = model_manager.ensure_model_exists(version)
+    if variant:
+        if engine != "torch":
+            raise ValueError("Model variants are only supported with the torch engine")
+        variant_info = model_manager.get_model_variant(version, variant)
+        with profiler.stage("load_model"):
+            return inference.load_model(
+                Path(variant_info["path"]), labels_path,
+                quantization_mode=variant_info["mode"], qengine=variant_info.get("qengine"),
+            )
+    with profiler.stage("load_model"):
+        return inference.load_model(model_path, labels_path, engine=engine)
+
+
+def bundle_files(version: int, engine: str = "torch", variant: str = None):
+    """(weights, labels) files load_bundle reads for an installed model"""
+    model_path = model_manager.MODELS_DIR / f"dermai_model_v{version}.pth"
+    labels_path = model_manager.MODELS_DIR / f"classes_v{version}.txt"
+    if variant:
+        return Path(model_manager.get_model_variant(version, variant)["path"]), labels_path
+    if engine == "onnx":
+        return onnx_path_for(model_path), labels_path
+    return weights.resolve_weights(model_path), labels_path
+
+
+def cache_key(version: int, engine: str = "torch", variant: str = None):
+    """
+    Prediction cache key of an installed model: the model key plus a fingerprint
+    of its weights and labels files, so predictions of replaced files (re-download,
+    re-quantize, convert-weights, new classes file) are never served
+    """
+    return model_key(version, engine, variant, fingerprint=file_fingerprint(*bundle_files(version, engine, variant)))
+
+
+class ModelPool:
+    """
+    Thread-safe set of loaded model bundles keyed by (version, engine, variant).
+    Keeps at most max_models loaded, evicting the least recently used.
+    """
+
+    def __init__(self, max_models: int = 2):
+        self.max_models = max(1, max_models)
+        self._bundles = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}  # key -> lock, so concurrent requests load a model only once
+
+    def get(self, version: int, engine: str = "torch", variant: str = None):
+        key = (version, engine, variant)
+        with self._lock:
+            if key in self._bundles:
+                self._bundles.move_to_end(key)
+                return self._bundles[key]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._bundles:  # loaded by another thread meanwhile
+                    self._bundles.move_to_end(key)
+                    return self._bundles[key]
+            bundle = load_bundle(version, engine, variant)
+            with self._lock:
+                self._bundles[key] = bundle
+                while len(self._bundles) > self.max_models:
+                    self._bundles.popitem(last=False)
+                self._loading.pop(key, None)
+            return bundle
+
+    def is_loaded(self, version: int, engine: str = "torch", variant: str = None):
+        with self._lock:
+            return (version, engine, variant) in self._bundles
+
+    def loaded(self):
+        """Loaded models, least recently used first"""
+        with self._lock:
+            return [
+                {"version": version, "engine": engine, "variant": variant}
+                for version, engine, variant in self._bundles
+            ]
@@ -0,0 +1,86 @@
+# dermaai_cli/core/onnx_engine.py
+import inspect
+from pathlib import Path
+
+import torch
+
+# ONNX graph I/O names (input is a (N, 3, 224, 224) normalised batch)
+INPUT_NAME = "input"
+OUTPUT_NAME = "logits"
+
+
+def onnx_path_for(model_path: Path):
+    """ONNX graph lives next to the .pth: dermai_model_v3.pth -> dermai_model_v3.onnx"""
+    return Path(model_path).with_suffix(".onnx")
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except ImportError:
+        raise RuntimeError(
+            "ONNX Runtime is not installed. Install it with: pip install 'dermaai[onnx]'"
+        )
+    return onnxruntime
+
+
+def export_onnx(model, onnx_path: Path):
+    """Export an eager ResNet18 to ONNX with a dynamic batch dimension"""
+    kwargs = {}
+    if "external_data" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["external_data"] = False  # keep weights inside the single .onnx file
+    dummy = torch.randn(1, 3, 224, 224)
+    model.eval()
+    torch.onnx.export(
+        model,
+        (dummy,),
+        str(onnx_path),
+        input_names=[INPUT_NAME],
+        output_names=[OUTPUT_NAME],
+        dynamic_axes={INPUT_NAME: {0: "batch"}, OUTPUT_NAME: {0: "batch"}},
+        **kwargs,
+    )
+    return Path(onnx_path)
+
+
+class OnnxModel:
+    """
+    ONNX Runtime (CPU execution provider) session that behaves like the eager
+    model for inference: called with a float tensor batch, returns logits as a tensor.
+    """
+
+    def __init__(self, onnx_path: Path, num_threads: int = 0):
+        ort = _import_onnxruntime()
+        if not Path(onnx_path).exists():
+            raise FileNotFoundError(
+                f"ONNX model not found: {onnx_path}. "
+                "Create it with: dermai export-onnx <version>"
+            )
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.path = Path(onnx_path)
+        self.session = ort.InferenceSession(
+            str(onnx_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def __call__(self, batch):
+        logits = self.session.run([OUTPUT_NAME], {INPUT_NAME: batch.contiguous().numpy()})[0]
+        return torch.from_numpy(logits)
+
+    def eval(self):
+        return self
+
+
+def check_parity(reference_model, candidate_model, batch):
+    """Compare two models on the same batch: top-1 agreement and max |logit| difference"""
+    with torch.no_grad():
+        expected = reference_model(batch)
+        actual = candidate_model(batch)
+    agreement = (expected.argmax(dim=1) == actual.argmax(dim=1)).float().mean().item()
+    return {
+        "samples": batch.shape[0],
+        "top1_agreement": agreement,
+        "max_abs_diff": (expected - actual).abs().max().item(),
+    }
@@ -1,28 +1,124 @@
 # dermaai_cli/core/output.py
-import pandas as pd
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+import csv
+import json
+from collections import Counter
 
+# Rows written between flushes, so partial results are on disk during long runs
+FLUSH_EVERY = 100
+# Rows per Parquet row group (each group is written as soon as it is full)
+ROW_GROUP_SIZE = 10_000
 
-def save_results(results, fmt, path):
-    df = pd.DataFrame(results)
-    summary = df["prediction"].value_counts().to_dict()
-    summary_str = "\n".join([f"{v} = {k}" for k, v in summary.items()])
 
-    if fmt == "md":
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(df.to_markdown(index=False))
-            f.write("\n\nSummary:\n" + summary_str)
+class ResultWriter:
+    """
+    Writes results one at a time as they are produced, keeping running
+    tallies of summary_key (the prediction by default) for the summary
+    instead of holding every row in memory.
+    """
+
+    def __init__(self, path, summary_key="prediction"):
+        self.path = path
+        self.summary_key = summary_key
+        self.rows = 0
+        self.summary = Counter()
+        self._closed = False
+        self._file = self._open()
+
+    def _open(self):
+        """Text file rows are streamed to (None for writers that lay out the file at close)"""
+        return open(self.path, "w", encoding="utf-8", newline="")
+
+    def write(self, result: dict):
+        self._write_row(result)
+        self.rows += 1
+        self.summary[result[self.summary_key]] += 1
+        if self._file is not None and self.rows % FLUSH_EVERY == 0:
+            self._file.flush()
+
+    def write_many(self, results):
+        for result in results:
+            self.write(result)
+
+    def summary_lines(self):
+        return [f"{count} = {prediction}" for prediction, count in self.summary.most_common()]
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._finish()
+        if self._file is not None:
+            self._file.close()
+
+    def _write_row(self, result: dict):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvWriter(ResultWriter):
+    def __init__(self, path, summary_key="prediction"):
+        super().__init__(path, summary_key)
+        self._writer = None
+
+    def _write_row(self, result):
+        if self._writer is None:  # columns come from the first result
+            self._writer = csv.DictWriter(self._file, fieldnames=list(result), extrasaction="ignore")
+            self._writer.writeheader()
+        self._writer.writerow(result)
+
+
+class JsonLinesWriter(ResultWriter):
+    """One JSON object per line, so every flushed line is a usable record"""
+
+    def _write_row(self, result):
+        self._file.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+class MarkdownWriter(ResultWriter):
+    def __init__(self, path, summary_key="prediction"):
+        super().__init__(path, summary_key)
+        self._columns = None
+
+    def _write_row(self, result):
+        if self._columns is None:
+            self._columns = list(result)
+            align = ["---:" if isinstance(result[c], (int, float)) else ":---" for c in self._columns]
+            self._file.write("| " + " | ".join(self._columns) + " |\n")
+            self._file.write("|" + "|".join(align) + "|\n")
+        self._file.write("| " + " | ".join(str(result.get(c, "")) for c in self._columns) + " |\n")
+
+    def _finish(self):
+        self._file.write("\nSummary:\n" + "\n".join(self.summary_lines()))
 
-    elif fmt == "csv":
-        df.to_csv(path, index=False)
 
-    elif fmt == "json":
-        df.to_json(path, orient="records", indent=2)
+class PdfWriter(ResultWriter):
+    """PDF tables are laid out in one go, so rows are buffered until close()"""
 
-    elif fmt == "pdf":
-        doc = SimpleDocTemplate(str(path))
+    def __init__(self, path, summary_key="prediction"):
+        super().__init__(path, summary_key)
+        self._rows = []
+
+    def _open(self):
+        return None
+
+    def _write_row(self, result):
+        self._rows.append(result)
+
+    def _finish(self):
+        # reportlab is only needed for PDF reports
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.lib import colors
+
+        doc = SimpleDocTemplate(str(self.path))
         styles = getSampleStyleSheet()
         elements = []
 
@@ -31,7 +127,8 @@ def save_results(results, fmt, path):
         elements.append(Spacer(1, 12))
 
         # Data table
-        data = [list(df.columns)] + df.values.tolist()
+        columns = list(self._rows[0]) if self._rows else ["image", "prediction", "confidence"]
+        data = [columns] + [[row.get(c, "") for c in columns] for row in self._rows]
         table = Table(data, repeatRows=1)
         table.setStyle(TableStyle([
             ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#4a90e2")),
@@ -46,11 +143,112 @@ def save_results(results, fmt, path):
 
         # Summary section
         elements.append(Paragraph("Summary", styles["Heading2"]))
-        for k, v in summary.items():
-            elements.append(Paragraph(f"{v} = {k}", styles["Normal"]))
+        for line in self.summary_lines():
+            elements.append(Paragraph(line, styles["Normal"]))
 
         # Build PDF
         doc.build(elements)
 
-    else:
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("pyarrow is not installed. Install it with: pip install 'dermaai[parquet]'")
+    return pyarrow
+
+
+class ParquetWriter(ResultWriter):
+    """
+    Columnar output, written in row groups of ROW_GROUP_SIZE rows.
+    "probabilities" become a fixed-size float32 list column (NaN for missing
+    files) and class_names are stored in the file metadata, so top-k can be
+    recomputed without re-running inference.
+    The first result fixes the columns and the first row group their types:
+    later results may leave columns out (null/NaN) but not add new ones.
+    """
+
+    def __init__(self, path, summary_key="prediction", class_names=None):
+        self.pa = _import_pyarrow()  # fails before anything is written when pyarrow is missing
+        super().__init__(path, summary_key)
+        self.class_names = class_names
+        self._columns = None
+        self._pending = []
+        self._writer = None
+
+    def _open(self):
+        return None  # pyarrow opens the path itself with the first row group
+
+    def _write_row(self, result):
+        if self._columns is None:
+            self._columns = list(result)
+        elif not result.keys() <= set(self._columns):
+            extra = ", ".join(sorted(result.keys() - set(self._columns)))
+            raise ValueError(f"Result has columns not in {self.path}: {extra}")
+        self._pending.append(result)
+        if len(self._pending) >= ROW_GROUP_SIZE:
+            self._write_group()
+
+    def _column(self, name, values):
+        pa = self.pa
+        if name == "probabilities":
+            import numpy as np
+
+            width = len(self.class_names) if self.class_names else max((len(v) for v in values if v), default=0)
+            matrix = np.full((len(values), width), np.nan, dtype=np.float32)
+            for i, row in enumerate(values):
+                if row is not None:
+                    matrix[i] = row
+            return pa.FixedSizeListArray.from_arrays(pa.array(matrix.reshape(-1)), width)
+        if self._writer is not None:
+            return pa.array(values, type=self._writer.schema.field(name).type)
+        if name.startswith("confidence"):
+            return pa.array(values, type=pa.float64())  # missing files have an int 0
+        return pa.array(values)
+
+    def _write_group(self):
+        table = self.pa.table({c: self._column(c, [r.get(c) for r in self._pending]) for c in self._columns})
+        if self._writer is None:
+            schema = table.schema
+            if self.class_names:
+                schema = schema.with_metadata({"dermai.classes": json.dumps(self.class_names)})
+            self._writer = self.pa.parquet.ParquetWriter(str(self.path), schema, compression="zstd")
+        self._writer.write_table(table)
+        self._pending.clear()
+
+    def _finish(self):
+        if self._pending:
+            self._write_group()
+        if self._writer is None:  # no results: still leave a readable file
+            empty = {"image": self.pa.array([], self.pa.string()), "prediction": self.pa.array([], self.pa.string()),
+                     "confidence": self.pa.array([], self.pa.float64())}
+            self.pa.parquet.write_table(self.pa.table(empty), str(self.path))
+        else:
+            self._writer.close()
+
+
+WRITERS = {
+    "md": MarkdownWriter,
+    "csv": CsvWriter,
+    "json": JsonLinesWriter,
+    "pdf": PdfWriter,
+    "parquet": ParquetWriter,
+}
+
+
+def open_writer(fmt, path, summary_key="prediction", class_names=None):
+    """
+    Incremental writer for an output format (use as a context manager).
+    class_names is recorded by formats that store probabilities (parquet).
+    """
+    if fmt not in WRITERS:
         raise ValueError(f"Unknown format: {fmt}")
+    if fmt == "parquet":
+        return WRITERS[fmt](path, summary_key, class_names)
+    return WRITERS[fmt](path, summary_key)
+
+
+def save_results(results, fmt, path):
+    with open_writer(fmt, path) as writer:
+        writer.write_many(results)
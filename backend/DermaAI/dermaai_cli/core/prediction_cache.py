@@ -0,0 +1,127 @@
+# dermaai_cli/core/prediction_cache.py
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+CACHE_FILE = Path.home() / ".dermai" / "prediction_cache.db"
+# Rows kept before least-recently-used entries are evicted (~150 bytes each)
+DEFAULT_MAX_ENTRIES = 200_000
+# Cache hits whose last_used is updated per write transaction (each commit
+# releases the write lock, so other processes sharing the cache aren't blocked)
+TOUCH_BATCH = 256
+
+
+def content_digest(data: bytes):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_fingerprint(*paths):
+    """Short hash of the names, sizes and mtimes of files (cheap: no file is read)"""
+    h = hashlib.sha256()
+    for path in paths:
+        stat = Path(path).stat()
+        h.update(f"{Path(path).name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    return h.hexdigest()[:12]
+
+
+def forget_model(version: int, path: Path = None):
+    """Drop cached predictions of every engine/variant of a model version (e.g. after its weights changed)"""
+    path = path or CACHE_FILE
+    if not path.exists():
+        return 0
+    db = sqlite3.connect(str(path), timeout=30)
+    try:
+        with db:
+            cur = db.execute(
+                "DELETE FROM predictions WHERE model_key LIKE ?", (f"v{version}/%",)
+            )
+        return cur.rowcount
+    except sqlite3.OperationalError:  # no predictions table yet
+        return 0
+    finally:
+        db.close()
+
+
+class PredictionCache:
+    """
+    On-disk cache of top-1 predictions keyed by image content hash + model key
+    (e.g. "v3/torch"), so re-scored images skip decode and the forward pass.
+    Safe to share between decode threads; call flush() at the end of a run to evict.
+    """
+
+    def __init__(self, model_key: str, path: Path = CACHE_FILE, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.model_key = model_key
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._touched = []  # digests hit since the last last_used update
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " model_key TEXT NOT NULL, digest TEXT NOT NULL,"
+            " prediction TEXT NOT NULL, confidence REAL NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (model_key, digest))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS predictions_last_used ON predictions (last_used)")
+        self._db.commit()
+
+    def get(self, digest: str):
+        """(prediction, confidence) for a cached image, or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT prediction, confidence FROM predictions WHERE model_key = ? AND digest = ?",
+                (self.model_key, digest),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._touched.append(digest)
+            if len(self._touched) >= TOUCH_BATCH:
+                self._touch()
+            return row
+
+    def _touch(self):
+        """Write the pending last_used updates in one short transaction (caller holds the lock)"""
+        if self._touched:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE predictions SET last_used = ? WHERE model_key = ? AND digest = ?",
+                [(now, self.model_key, digest) for digest in self._touched],
+            )
+            self._db.commit()
+            self._touched.clear()
+
+    def put_many(self, entries):
+        """Store [(digest, prediction, confidence)]"""
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?)",
+                [(self.model_key, digest, pred, conf, now) for digest, pred, conf in entries],
+            )
+            self._db.commit()
+
+    def flush(self):
+        """Commit pending writes and evict least recently used rows over the bound"""
+        with self._lock:
+            self._touch()
+            (count,) = self._db.execute("SELECT COUNT(*) FROM predictions").fetchone()
+            if count > self.max_entries:
+                # Evict down to 90% so we don't evict on every flush
+                self._db.execute(
+                    "DELETE FROM predictions WHERE rowid IN "
+                    "(SELECT rowid FROM predictions ORDER BY last_used LIMIT ?)",
+                    (count - int(self.max_entries * 0.9),),
+                )
+            self._db.commit()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,134 @@
+# dermaai_cli/core/profiler.py
+# Per-stage timings for `predict run --profile`. Code paths take a profiler
+# argument defaulting to NULL_PROFILER, whose methods do nothing, so the
+# instrumentation costs a few no-op calls per image when profiling is off.
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+# Upper bounds (ms) of the latency histogram buckets
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+class NullProfiler:
+    enabled = False
+
+    def stage(self, name, **args):
+        return _NULL_CONTEXT
+
+    def forward(self, batch_size):
+        return _NULL_CONTEXT
+
+    def clock(self):
+        return 0
+
+    def record(self, name, start_ns, end_ns=None, **args):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class Profiler(NullProfiler):
+    """
+    Records (stage, start, duration, thread) events. stage() times a block;
+    record() logs an already measured span, e.g. an image's end-to-end latency.
+    With torch_profile, forward passes also run under torch.profiler.
+    """
+
+    enabled = True
+
+    def __init__(self, torch_profile: bool = False):
+        self.events = []  # (name, start_ns, duration_ns, thread id, args); append is thread-safe
+        self.thread_names = {}
+        self.origin_ns = time.perf_counter_ns()
+        self._torch_profiler = None
+        if torch_profile:
+            import torch
+            self._torch_profiler = torch.profiler.profile(
+                activities=[torch.profiler.ProfilerActivity.CPU], record_shapes=True
+            )
+            self._torch_profiler.start()
+
+    def clock(self):
+        return time.perf_counter_ns()
+
+    def record(self, name, start_ns, end_ns=None, **args):
+        end_ns = end_ns or time.perf_counter_ns()
+        thread = threading.current_thread()
+        self.thread_names[thread.ident] = thread.name
+        self.events.append((name, start_ns, end_ns - start_ns, thread.ident, args))
+
+    @contextlib.contextmanager
+    def stage(self, name, **args):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start, **args)
+
+    @contextlib.contextmanager
+    def forward(self, batch_size):
+        with self.stage("forward", batch_size=batch_size):
+            if self._torch_profiler is None:
+                yield
+            else:
+                import torch
+                with torch.profiler.record_function("dermai.forward"):
+                    yield
+
+    def stop(self):
+        """Stop the torch profiler (if any); returns it for its reports"""
+        if self._torch_profiler is not None:
+            self._torch_profiler.stop()
+        return self._torch_profiler
+
+    def durations_ms(self):
+        by_stage = defaultdict(list)
+        for name, _, duration, _, _ in self.events:
+            by_stage[name].append(duration / 1e6)
+        return by_stage
+
+    def summary(self):
+        """Per stage: count, total/mean/p50/p95/max in ms (stages in first-seen order)"""
+        from dermaai_cli.core.benchmark import percentile
+
+        rows = {}
+        for name, values in self.durations_ms().items():
+            rows[name] = {
+                "count": len(values),
+                "total_ms": sum(values),
+                "mean_ms": sum(values) / len(values),
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "max_ms": max(values),
+            }
+        return rows
+
+    def histogram(self, name):
+        """[(bucket upper bound ms, count)] for one stage"""
+        counts = [0] * len(HISTOGRAM_BUCKETS_MS)
+        for value in self.durations_ms().get(name, []):
+            counts[next(i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if value <= bound)] += 1
+        return list(zip(HISTOGRAM_BUCKETS_MS, counts))
+
+    def write_chrome_trace(self, path):
+        """Timeline for chrome://tracing or https://ui.perfetto.dev"""
+        pid = os.getpid()
+        trace = [
+            {
+                "name": name, "ph": "X", "pid": pid, "tid": tid,
+                "ts": (start - self.origin_ns) / 1000, "dur": duration / 1000, "args": args,
+            }
+            for name, start, duration, tid, args in self.events
+        ]
+        trace += [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in self.thread_names.items()
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,107 @@
+# dermaai_cli/core/quantization.py
+import time
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from torchvision.models import resnet18
+from torchvision.models.quantization import resnet18 as quantizable_resnet18
+
+# Quantization modes -> name of the registered model variant
+#   static:  int8 weights and activations, calibrated on sample images (conv + fc)
+#   dynamic: int8 fc weights only, activations quantized on the fly (no calibration)
+VARIANT_NAMES = {"static": "int8", "dynamic": "int8-dynamic"}
+
+
+def variant_path_for(model_path: Path, variant: str):
+    """dermai_model_v3.pth -> dermai_model_v3_int8.pth"""
+    model_path = Path(model_path)
+    return model_path.with_name(f"{model_path.stem}_{variant}{model_path.suffix}")
+
+
+def _use_qengine(qengine: str = None):
+    """Select the quantized kernel backend (x86/fbgemm on Intel/AMD, qnnpack on ARM)"""
+    supported = torch.backends.quantized.supported_engines
+    if qengine and qengine in supported:
+        torch.backends.quantized.engine = qengine
+    elif torch.backends.quantized.engine == "none":
+        torch.backends.quantized.engine = next(e for e in ("x86", "fbgemm", "qnnpack") if e in supported)
+    return torch.backends.quantized.engine
+
+
+def _prepared_static_model(num_classes: int, qengine: str, state_dict: dict = None):
+    """Fused ResNet18 with quant/dequant stubs and observers attached"""
+    model = quantizable_resnet18(weights=None, quantize=False)
+    model.fc = nn.Linear(model.fc.in_features, num_classes)
+    if state_dict is not None:
+        model.load_state_dict(state_dict)  # before fusion folds batchnorm into conv
+    model.eval()
+    model.fuse_model()
+    model.qconfig = torch.ao.quantization.get_default_qconfig(qengine)
+    torch.ao.quantization.prepare(model, inplace=True)
+    return model
+
+
+def quantize_static(state_dict: dict, num_classes: int, calibration_batches):
+    """Calibrate on an iterable of image batches and convert to an int8 model"""
+    qengine = _use_qengine()
+    model = _prepared_static_model(num_classes, qengine, state_dict)
+    with torch.no_grad():
+        for batch in calibration_batches:
+            model(batch)
+    torch.ao.quantization.convert(model, inplace=True)
+    return model, qengine
+
+
+def quantize_dynamic(fp32_model):
+    """Quantize the fc layer's weights to int8 (activations stay fp32)"""
+    qengine = _use_qengine()
+    model = torch.ao.quantization.quantize_dynamic(fp32_model, {nn.Linear}, dtype=torch.qint8)
+    return model, qengine
+
+
+def load_quantized(model_path: Path, num_classes: int, mode: str, qengine: str = None):
+    """Rebuild the quantized module structure and load a saved int8 state dict"""
+    qengine = _use_qengine(qengine)
+    if mode == "static":
+        model = _prepared_static_model(num_classes, qengine)
+        torch.ao.quantization.convert(model, inplace=True)
+    elif mode == "dynamic":
+        model = resnet18(weights=None)
+        model.fc = nn.Linear(model.fc.in_features, num_classes)
+        model.eval()
+        model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+    else:
+        raise ValueError(f"Unknown quantization mode: {mode}. Choose one of: {', '.join(VARIANT_NAMES)}")
+    model.load_state_dict(torch.load(model_path, map_location="cpu"))
+    model.eval()
+    return model
+
+
+def compare_models(fp32_model, quantized_model, batches):
+    """
+    Run both models over the same batches.
+    Returns top-1 agreement and the fp32/int8 forward time ratio (speedup).
+    """
+    agree = total = 0
+    fp32_s = quantized_s = 0.0
+    with torch.no_grad():
+        for batch in batches:
+            start = time.perf_counter()
+            expected = fp32_model(batch).argmax(dim=1)
+            fp32_s += time.perf_counter() - start
+
+            start = time.perf_counter()
+            actual = quantized_model(batch).argmax(dim=1)
+            quantized_s += time.perf_counter() - start
+
+            agree += (expected == actual).sum().item()
+            total += batch.shape[0]
+
+    return {
+        "samples": total,
+        "top1_agreement": agree / total if total else 0.0,
+        "fp32_s": fp32_s,
+        "int8_s": quantized_s,
+        "speedup": fp32_s / quantized_s if quantized_s else 0.0,
+    }
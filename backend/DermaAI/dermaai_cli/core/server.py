@@ -0,0 +1,144 @@
+# dermaai_cli/core/server.py
+import json
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from dermaai_cli.core import inference
+from dermaai_cli.core.client import SERVE_FILE
+from dermaai_cli.core.config import DEFAULT_SERVE_HOST, DEFAULT_SERVE_PORT, model_key
+from dermaai_cli.core.model_pool import ModelPool, cache_key
+from dermaai_cli.core.prediction_cache import CACHE_FILE, PredictionCache
+
+
+class InferenceServer(ThreadingHTTPServer):
+    """Localhost HTTP daemon keeping models loaded between predict calls"""
+
+    daemon_threads = True
+
+    def __init__(self, host=DEFAULT_SERVE_HOST, port=DEFAULT_SERVE_PORT, max_models=2,
+                 batch_size=inference.DEFAULT_BATCH_SIZE, num_workers=inference.DEFAULT_DECODE_WORKERS,
+                 cache_path=CACHE_FILE):
+        super().__init__((host, port), _Handler)
+        self.pool = ModelPool(max_models)
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.cache_path = cache_path
+        self.started = time.time()
+        self.requests = Counter()
+        self.images = Counter()
+        self.cache = Counter()  # prediction cache hits/misses over all requests
+        self.errors = 0
+        self._stats_lock = threading.Lock()
+
+    def count(self, endpoint: str, model_key: str = None, images: int = 0, error: bool = False, cache=None):
+        with self._stats_lock:
+            self.requests[endpoint] += 1
+            if model_key:
+                self.images[model_key] += images
+            if cache is not None:
+                self.cache["hits"] += cache.hits
+                self.cache["misses"] += cache.misses
+            if error:
+                self.errors += 1
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "uptime_s": round(time.time() - self.started, 1),
+                "loaded_models": self.pool.loaded(),
+                "requests": dict(self.requests),
+                "images": dict(self.images),
+                "cache": {"hits": self.cache["hits"], "misses": self.cache["misses"]},
+                "errors": self.errors,
+            }
+
+    def write_serve_file(self):
+        """Advertise host/port so clients find the daemon (see core/client.py)"""
+        host, port = self.server_address[:2]
+        SERVE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        SERVE_FILE.write_text(json.dumps({"host": host, "port": port, "pid": os.getpid()}))
+
+    def remove_serve_file(self):
+        try:
+            if json.loads(SERVE_FILE.read_text()).get("pid") == os.getpid():
+                SERVE_FILE.unlink()
+        except (OSError, ValueError):
+            pass
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: InferenceServer
+
+    def log_message(self, format, *args):  # keep the daemon's console quiet
+        pass
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self.server.count("health")
+            self._send(200, {"status": "ok", "pid": os.getpid()})
+        elif self.path == "/stats":
+            self.server.count("stats")
+            self._send(200, self.server.stats())
+        else:
+            self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        if self.path not in ("/predict", "/load"):
+            self._send(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        endpoint = self.path.strip("/")
+        try:
+            request = self._read_json()
+            version = int(request["model_version"])
+            engine = request.get("engine", "torch")
+            variant = request.get("variant")
+            key = model_key(version, engine, variant)
+            bundle = self.server.pool.get(version, engine, variant)
+
+            if endpoint == "load":
+                self.server.count(endpoint)
+                self._send(200, {"loaded": key})
+                return
+
+            images = request.get("images", [])
+            cache = None
+            if request.get("use_cache", True):
+                cache = PredictionCache(cache_key(version, engine, variant), path=self.server.cache_path)
+            try:
+                results = list(inference.run_inference(
+                    bundle, [Path(p) for p in images],
+                    batch_size=request.get("batch_size") or self.server.batch_size,
+                    num_workers=self.server.num_workers,
+                    cache=cache,
+                ))
+            finally:
+                if cache is not None:
+                    cache.close()
+            self.server.count(endpoint, key, len(images), cache=cache)
+            response = {"results": results}
+            if cache is not None:
+                response["cache"] = {"hits": cache.hits, "misses": cache.misses}
+            self._send(200, response)
+        except (KeyError, ValueError, TypeError) as e:
+            self.server.count(endpoint, error=True)
+            self._send(400, {"error": f"Bad request: {e}"})
+        except Exception as e:
+            self.server.count(endpoint, error=True)
+            self._send(500, {"error": str(e)})
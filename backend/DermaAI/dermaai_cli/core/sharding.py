@@ -0,0 +1,126 @@
+# dermaai_cli/core/sharding.py
+# Multi-process inference for many-core hosts: the image stream is cut into
+# chunks that worker processes score with a fixed torch thread budget each.
+# Weights are loaded once in the parent and moved to shared memory, so every
+# worker maps the same copy instead of loading its own.
+import os
+import queue
+from itertools import islice
+
+import torch
+import torch.nn as nn
+import torch.multiprocessing as mp
+
+from dermaai_cli.core import inference
+from dermaai_cli.core.config import DEFAULT_BATCH_SIZE
+
+# Chunks queued or being scored per worker (bounds memory for endless streams)
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+# How often the parent checks that workers are still alive while waiting
+_POLL_S = 1.0
+
+
+def default_threads(workers: int):
+    """Torch intra-op threads per worker so workers x threads fits the cores"""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _worker(model, class_names, tasks, results, threads, batch_size, cache_key, cache_path, probabilities):
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+    cache = None
+    if cache_key:
+        from dermaai_cli.core.prediction_cache import PredictionCache
+        cache = PredictionCache(cache_key, path=cache_path)
+    try:
+        for chunk_id, paths in iter(tasks.get, None):
+            try:
+                # One decode thread per worker: the other cores belong to other workers
+                scored = list(inference.run_inference(
+                    (model, class_names), paths, batch_size=batch_size, num_workers=1, cache=cache,
+                    probabilities=probabilities,
+                ))
+                results.put((chunk_id, scored, None))
+            except Exception as e:
+                results.put((chunk_id, None, f"{type(e).__name__}: {e}"))
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def run_sharded(model_bundle, image_paths, workers: int, threads: int = None,
+                batch_size: int = DEFAULT_BATCH_SIZE, cache_key: str = None, cache_path=None,
+                probabilities: bool = False):
+    """
+    Like inference.run_inference, but spread over `workers` processes with
+    `threads` torch threads each; results are yielded in input order.
+    cache_key enables the prediction cache in the workers (shared SQLite file).
+    """
+    model, class_names = model_bundle
+    if not isinstance(model, nn.Module):
+        raise ValueError("--workers needs an eager PyTorch model (not the ONNX engine)")
+    threads = threads or default_threads(workers)
+    if cache_key and cache_path is None:
+        from dermaai_cli.core.prediction_cache import CACHE_FILE
+        cache_path = CACHE_FILE
+
+    model.share_memory()
+    ctx = mp.get_context("spawn")  # forking after torch has started its thread pools can deadlock
+    tasks = ctx.Queue(maxsize=workers * CHUNKS_IN_FLIGHT_PER_WORKER)
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(
+            target=_worker, name=f"dermai-worker-{i}", daemon=True,
+            args=(model, class_names, tasks, results, threads, batch_size, cache_key, cache_path, probabilities),
+        )
+        for i in range(workers)
+    ]
+    for proc in procs:
+        proc.start()
+
+    done = {}  # chunk id -> results, until every earlier chunk has been yielded
+
+    def receive():
+        while True:
+            try:
+                chunk_id, scored, error = results.get(timeout=_POLL_S)
+                break
+            except queue.Empty:
+                if not all(proc.is_alive() for proc in procs):
+                    raise RuntimeError("An inference worker exited unexpectedly")
+        if error:
+            raise RuntimeError(f"Inference worker failed: {error}")
+        done[chunk_id] = scored
+
+    image_paths = iter(image_paths)
+    sent = 0
+    next_chunk = 0
+    try:
+        while True:
+            chunk = [str(p) for p in islice(image_paths, batch_size)]
+            if not chunk:
+                break
+            while sent - next_chunk >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                receive()
+                while next_chunk in done:
+                    yield from done.pop(next_chunk)
+                    next_chunk += 1
+            tasks.put((sent, chunk))
+            sent += 1
+
+        while next_chunk < sent:
+            if next_chunk not in done:
+                receive()
+            while next_chunk in done:
+                yield from done.pop(next_chunk)
+                next_chunk += 1
+
+        for _ in procs:
+            tasks.put(None)
+        for proc in procs:
+            proc.join()
+    finally:
+        # Early exit or error: don't leave workers behind
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
@@ -0,0 +1,73 @@
+# dermaai_cli/core/sources.py
+# Lazy image path sources for `predict run`: everything is a generator, so
+# huge folders/manifests start scoring immediately and use constant memory.
+import glob
+import json
+import os
+from itertools import chain
+from pathlib import Path
+
+from dermaai_cli.core.config import IMAGE_EXTENSIONS
+
+
+def iter_dir(root: Path, recursive: bool = True, extensions=IMAGE_EXTENSIONS):
+    """Image files under root, streamed with os.scandir (directory order, not sorted)"""
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in extensions:
+                    yield Path(entry.path)
+
+
+def iter_glob(pattern: str):
+    """Files matching a glob pattern (** matches subfolders)"""
+    for match in glob.iglob(pattern, recursive=True):
+        if os.path.isfile(match):
+            yield Path(match)
+
+
+def iter_manifest(path: Path):
+    """
+    Image paths from a manifest file: JSON ({"images": [...]} or [...]),
+    or plain text with one path per line (streamed line by line).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        head = f.read(1)
+        while head and head.isspace():
+            head = f.read(1)
+        f.seek(0)
+
+        if head in ("{", "["):
+            # The stdlib has no streaming JSON parser; large manifests should be text
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON in {path}: {e}")
+            if isinstance(data, dict) and "images" in data:
+                data = data["images"]
+            if not isinstance(data, list):
+                raise ValueError(
+                    f"Invalid JSON format in {path}. Expected {{'images': [...]}} or a list of paths."
+                )
+            for p in data:
+                yield Path(p)
+            return
+
+        for line in f:
+            line = line.strip()
+            if line:
+                yield Path(line)
+
+
+def iter_image_paths(images=None, manifests=None, dirs=None, patterns=None, recursive=True):
+    """All requested inputs chained lazily, in the order: images, manifests, dirs, globs"""
+    return chain(
+        images or [],
+        chain.from_iterable(iter_manifest(m) for m in manifests or []),
+        chain.from_iterable(iter_dir(d, recursive) for d in dirs or []),
+        chain.from_iterable(iter_glob(p) for p in patterns or []),
+    )
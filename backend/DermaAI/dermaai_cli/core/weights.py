@@ -0,0 +1,87 @@
+# dermaai_cli/core/weights.py
+# Fast weight loading: safetensors files are memory-mapped instead of read and
+# unpickled, and the model is built on the meta device so no time is spent on
+# random init that the checkpoint overwrites anyway.
+import importlib.util
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+from torchvision.models import resnet18
+
+SAFETENSORS_SUFFIX = ".safetensors"
+
+
+def _import_safetensors():
+    try:
+        import safetensors.torch
+    except ImportError:
+        raise RuntimeError(
+            "safetensors is not installed. Install it with: pip install 'dermaai[safetensors]'"
+        )
+    return safetensors.torch
+
+
+def safetensors_available():
+    """Whether safetensors can be imported (checked without importing it)"""
+    return importlib.util.find_spec("safetensors") is not None
+
+
+def safetensors_path_for(model_path: Path):
+    """dermai_model_v3.pth -> dermai_model_v3.safetensors"""
+    return Path(model_path).with_suffix(SAFETENSORS_SUFFIX)
+
+
+def resolve_weights(model_path: Path):
+    """
+    Prefer a converted .safetensors next to the .pth, unless the .pth is newer
+    (e.g. after sync) or safetensors isn't installed to read it.
+    """
+    model_path = Path(model_path)
+    converted = safetensors_path_for(model_path)
+    if model_path.suffix != SAFETENSORS_SUFFIX and converted.exists() and safetensors_available():
+        if not model_path.exists() or converted.stat().st_mtime >= model_path.stat().st_mtime:
+            return converted
+    return model_path
+
+
+def load_state_dict(weights_path: Path):
+    """State dict from a .pth (memory-mapped where possible) or .safetensors, upcast to float32"""
+    weights_path = Path(weights_path)
+    if weights_path.suffix == SAFETENSORS_SUFFIX:
+        state_dict = _import_safetensors().load_file(str(weights_path), device="cpu")
+    else:
+        try:
+            state_dict = torch.load(weights_path, map_location="cpu", mmap=True, weights_only=True)
+        except RuntimeError:  # legacy (non-zip) checkpoints can't be memory-mapped
+            state_dict = torch.load(weights_path, map_location="cpu")
+    # fp16-on-disk weights are computed in float32
+    return {
+        k: v.float() if v.dtype == torch.float16 else v
+        for k, v in state_dict.items()
+    }
+
+
+def build_resnet18(state_dict: dict, num_classes: int):
+    """ResNet18 using the given tensors directly (no random init, no copy)"""
+    with torch.device("meta"):
+        model = resnet18(weights=None)
+        model.fc = nn.Linear(model.fc.in_features, num_classes)
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+    return model
+
+
+def convert_to_safetensors(model_path: Path, out_path: Path = None, fp16: bool = False):
+    """Write a .pth state dict as .safetensors (optionally float16 on disk); returns the path"""
+    st = _import_safetensors()
+    out_path = Path(out_path) if out_path else safetensors_path_for(model_path)
+    state_dict = torch.load(model_path, map_location="cpu", weights_only=True)
+    if fp16:
+        state_dict = {k: v.half() if v.is_floating_point() else v for k, v in state_dict.items()}
+    # safetensors needs contiguous tensors that don't share storage
+    state_dict = {k: v.contiguous().clone() for k, v in state_dict.items()}
+    tmp = out_path.with_name(out_path.name + ".tmp")
+    st.save_file(state_dict, str(tmp), metadata={"dtype": "float16" if fp16 else "float32"})
+    tmp.replace(out_path)
+    return out_path
@@ -0,0 +1,245 @@
+# dermaai_cli/tests/test_models.py
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from dermaai_cli.core import downloader, model_manager, prediction_cache
+
+PAYLOAD = os.urandom(300_000)
+
+
+class _BucketHandler(BaseHTTPRequestHandler):
+    """Stands in for the S3 bucket: HEAD, GET with Range, and <key>.sha256"""
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        files = self.server.files
+        return files.get(self.path.lstrip("/"))
+
+    def do_HEAD(self):
+        body = self._body()
+        if body is None:
+            self.send_error(404)
+            return
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        self.send_response(304 if self.headers.get("If-None-Match") == etag else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path.startswith("/?list-type=2"):
+            self.server.listings += 1
+            keys = "".join(f"<Contents><Key>{k}</Key></Contents>" for k in self.server.files)
+            body = f'<ListBucketResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">{keys}</ListBucketResult>'
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body.encode())
+            return
+        body = self._body()
+        if body is None:
+            self.send_error(404)
+            return
+        self.server.gets.append(self.headers.get("Range"))
+        rng = self.headers.get("Range")
+        if not rng:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        start, end = (int(x) for x in rng.split("=")[1].split("-"))
+        if self.server.fail_from is not None and start >= self.server.fail_from:
+            self.send_error(503)  # connection "drops" for the tail of the file
+            return
+        self.send_response(206)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+        self.end_headers()
+        self.wfile.write(body[start:end + 1])
+
+
+@pytest.fixture
+def bucket():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BucketHandler)
+    server.files = {
+        "model.pth": PAYLOAD,
+        "model.pth.sha256": f"{hashlib.sha256(PAYLOAD).hexdigest()}  model.pth\n".encode(),
+        "bad.pth": PAYLOAD,
+        "bad.pth.sha256": b"0" * 64,
+    }
+    server.gets = []
+    server.listings = 0
+    server.fail_from = None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server, key):
+    return f"http://127.0.0.1:{server.server_address[1]}/{key}"
+
+
+def test_parallel_download_is_verified_and_atomic(bucket, tmp_path):
+    dest = tmp_path / "model.pth"
+    info = downloader.download(_url(bucket, "model.pth"), dest, connections=4, part_size=64_000)
+
+    assert dest.read_bytes() == PAYLOAD
+    assert info["sha256"] == hashlib.sha256(PAYLOAD).hexdigest()
+    assert info["size"] == len(PAYLOAD)
+    assert sum(1 for r in bucket.gets if r) == 5  # 300 KB in 64 KB ranges
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["model.pth"]
+
+
+def test_download_resumes_missing_ranges(bucket, tmp_path):
+    dest = tmp_path / "model.pth"
+    bucket.fail_from = 128_000
+    with pytest.raises(Exception):
+        downloader.download(_url(bucket, "model.pth"), dest, connections=1, part_size=64_000)
+    assert not dest.exists()
+    assert (tmp_path / "model.pth.part").exists()
+
+    bucket.fail_from = None
+    bucket.gets.clear()
+    downloader.download(_url(bucket, "model.pth"), dest, connections=2, part_size=64_000)
+
+    assert dest.read_bytes() == PAYLOAD
+    assert sorted(r for r in bucket.gets if r) == [
+        "bytes=128000-191999", "bytes=192000-255999", "bytes=256000-299999",
+    ]
+
+
+def test_checksum_mismatch_keeps_final_path_clean(bucket, tmp_path):
+    dest = tmp_path / "bad.pth"
+    with pytest.raises(downloader.ChecksumError):
+        downloader.download(_url(bucket, "bad.pth"), dest, part_size=64_000)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_sync_refetches_only_changed_files(bucket, tmp_path, monkeypatch):
+    models_dir = tmp_path / "models"
+    monkeypatch.setattr(model_manager, "MODELS_DIR", models_dir)
+    monkeypatch.setattr(model_manager, "INDEX_FILE", models_dir / "model_index.json")
+    monkeypatch.setattr(model_manager, "REMOTE_VERSIONS_FILE", tmp_path / "remote_versions.json")
+    monkeypatch.setattr(model_manager, "S3_BASE_URL", _url(bucket, "").rstrip("/"))
+    monkeypatch.setattr(prediction_cache, "CACHE_FILE", tmp_path / "prediction_cache.db")
+    bucket.files.update({
+        "dermai_model_v1.pth": PAYLOAD,
+        "classes_v1.txt": b"nevus\nmelanoma\n",
+        "dermai_model_v2.pth": b"v2",
+    })
+
+    model_manager.download_model(1)
+    bucket.gets.clear()
+    assert model_manager.sync_model(1) == {"dermai_model_v1.pth": "unchanged", "classes_v1.txt": "unchanged"}
+    assert bucket.gets == []  # conditional HEADs only
+
+    bucket.files["classes_v1.txt"] = b"nevus\nmelanoma\nbcc\n"
+    assert model_manager.sync_model(1) == {"dermai_model_v1.pth": "unchanged", "classes_v1.txt": "updated"}
+    assert (models_dir / "classes_v1.txt").read_bytes() == b"nevus\nmelanoma\nbcc\n"
+
+    assert model_manager.list_remote_versions() == [1, 2]
+    assert model_manager.list_remote_versions() == [1, 2]
+    assert bucket.listings == 1  # second call served from the cached listing
+
+
+def test_index_survives_concurrent_writers(tmp_path):
+    # Each process registers its own versions; unlocked read-modify-write loses some
+    script = (
+        "import sys\n"
+        "from dermaai_cli.core import model_manager\n"
+        "start = int(sys.argv[1])\n"
+        "for v in range(start, start + 10):\n"
+        "    model_manager.add_model(v, f'm{v}.pth', {'version': v})\n"
+        "    model_manager.update_model_metadata(v, accuracy=0.5)\n"
+    )
+    env = dict(os.environ, HOME=str(tmp_path), USERPROFILE=str(tmp_path))
+    cwd = Path(__file__).parents[2]
+    procs = [
+        subprocess.Popen([sys.executable, "-c", script, str(i * 10)], cwd=cwd, env=env)
+        for i in range(6)
+    ]
+    assert all(p.wait(timeout=60) == 0 for p in procs)
+
+    index = json.loads((tmp_path / ".dermai" / "models" / "model_index.json").read_text())
+    models = index["installed_models"]
+    assert sorted(m["version"] for m in models) == list(range(60))
+    assert all(m["metadata"]["accuracy"] == 0.5 for m in models)
+
+
+def test_repl_keeps_recent_models_loaded(monkeypatch):
+    from typer.testing import CliRunner
+    from dermaai_cli.commands import interactive
+    from dermaai_cli.core import client, model_pool
+
+    loads = []
+
+    def fake_load_bundle(version, engine="torch", variant=None):
+        loads.append(version)
+        return object(), ["nevus"]
+
+    monkeypatch.setattr(client, "find_server", lambda: None)
+    monkeypatch.setattr(model_pool, "load_bundle", fake_load_bundle)
+    commands = ("preload 2\nswitch-model 1\nswitch-model 2\nswitch-model 1\nswitch-model 3\nswitch-model 1\n"
+                "model-info x\nexit\n")
+    result = CliRunner().invoke(interactive.app, ["--max-models", "2"], input=commands)
+
+    assert result.exit_code == 0, result.output
+    assert result.output.count("Switched to model") == 5
+    assert sorted(loads) == [1, 2, 3]  # 1 is never evicted: it was used more recently than 2
+    assert "❌ Usage: model-info <version>" in result.output
+
+
+def test_repl_survives_a_stopped_daemon(monkeypatch, tmp_path):
+    from typer.testing import CliRunner
+    from dermaai_cli.commands import interactive
+    from dermaai_cli.core import client
+
+    def stopped(*args, **kwargs):
+        raise client.DaemonError("Daemon unreachable: connection refused")
+        yield
+
+    monkeypatch.setattr(client, "find_server", lambda: "http://127.0.0.1:1")
+    monkeypatch.setattr(client, "load", lambda *args, **kwargs: {"loaded": "v1/torch"})
+    monkeypatch.setattr(client, "predict", stopped)
+    commands = f"switch-model 1\npredict a.jpg\npredict-dir {tmp_path}\nexit\n"
+    result = CliRunner().invoke(interactive.app, [], input=commands)
+
+    assert result.exit_code == 0, result.output
+    assert result.output.count("❌ Daemon unreachable") == 2
+
+
+def test_repl_reports_bad_images_and_unknown_models(monkeypatch, tmp_path):
+    from typer.testing import CliRunner
+    from dermaai_cli.commands import interactive
+    from dermaai_cli.core import client, inference, model_manager, model_pool
+
+    def scores(bundle, image_paths, *args, **kwargs):
+        for path in image_paths:
+            inference.preprocess_image(path)  # raises for the broken file
+            yield {"image": str(path), "prediction": "nevus", "confidence": 0.9}
+
+    (tmp_path / "broken.jpg").write_bytes(b"not an image")
+    monkeypatch.setattr(client, "find_server", lambda: None)
+    monkeypatch.setattr(model_pool, "load_bundle", lambda *args: (object(), ["nevus"]))
+    monkeypatch.setattr(inference, "run_inference", scores)
+    monkeypatch.setattr(model_manager, "list_models", lambda: [])
+    commands = (f"switch-model 1\npredict {tmp_path / 'broken.jpg'}\npredict-dir {tmp_path}\n"
+                "model-info 9\nhelp\nexit\n")
+    result = CliRunner().invoke(interactive.app, [], input=commands)
+
+    assert result.exit_code == 0, result.output
+    assert result.output.count("❌ cannot identify image file") == 2
+    assert "❌ Model v9 not found" in result.output
+    assert "Commands:" in result.output  # still running after the errors
@@ -0,0 +1,92 @@
+# dermaai_cli/tests/test_output.py
+import csv
+import json
+
+import pytest
+
+from dermaai_cli.core import output
+
+RESULTS = [
+    {"image": "a.jpg", "prediction": "eczema", "confidence": 0.91},
+    {"image": "b.jpg", "prediction": "acne", "confidence": 0.55},
+    {"image": "c.jpg", "prediction": "eczema", "confidence": 0.73},
+    {"image": "d.jpg", "prediction": "❌ File not found", "confidence": 0},
+]
+
+
+@pytest.mark.parametrize("fmt", ["md", "csv", "json"])
+def test_writers_flush_partial_results(fmt, tmp_path, monkeypatch):
+    monkeypatch.setattr(output, "FLUSH_EVERY", 2)
+    path = tmp_path / f"results.{fmt}"
+
+    writer = output.open_writer(fmt, path)
+    writer.write_many(RESULTS[:2])
+    assert "b.jpg" in path.read_text(encoding="utf-8")  # visible before close
+    writer.write_many(RESULTS[2:])
+    writer.close()
+
+    assert writer.summary == {"eczema": 2, "acne": 1, "❌ File not found": 1}
+    assert writer.summary_lines()[0] == "2 = eczema"
+
+
+def test_json_output_is_json_lines(tmp_path):
+    path = tmp_path / "results.json"
+    output.save_results(RESULTS, "json", path)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == RESULTS
+
+
+def test_csv_and_md_rows(tmp_path):
+    output.save_results(RESULTS, "csv", tmp_path / "r.csv")
+    with open(tmp_path / "r.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["image"] for r in rows] == ["a.jpg", "b.jpg", "c.jpg", "d.jpg"]
+
+    output.save_results(RESULTS, "md", tmp_path / "r.md")
+    text = (tmp_path / "r.md").read_text(encoding="utf-8")
+    assert text.startswith("| image | prediction | confidence |\n|:---|:---|---:|\n")
+    assert text.endswith("Summary:\n2 = eczema\n1 = acne\n1 = ❌ File not found")
+
+
+def test_parquet_row_groups_and_probabilities(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(output, "ROW_GROUP_SIZE", 3)
+    classes = ["acne", "eczema"]
+    probs = {"a.jpg": [0.09, 0.91], "b.jpg": [0.55, 0.45], "c.jpg": [0.27, 0.73], "d.jpg": None}
+    rows = [dict(r, probabilities=probs[r["image"]]) for r in RESULTS] * 2
+
+    with output.open_writer("parquet", tmp_path / "r.parquet", class_names=classes) as writer:
+        writer.write_many(rows)
+    assert writer.summary["eczema"] == 4
+
+    parquet = pq.ParquetFile(tmp_path / "r.parquet")
+    assert parquet.metadata.num_row_groups == 3
+    assert json.loads(parquet.schema_arrow.metadata[b"dermai.classes"]) == classes
+    table = parquet.read()
+    assert table.column("image").to_pylist() == [r["image"] for r in rows]
+    assert table.column("confidence").to_pylist()[3] == 0.0
+    vectors = table.column("probabilities").to_pylist()
+    assert vectors[0] == pytest.approx([0.09, 0.91])
+    assert all(v != v for v in vectors[3])  # NaN for the missing file
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        output.open_writer("xlsx", tmp_path / "r.xlsx")
+
+
+def test_parquet_keeps_the_first_rows_columns(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(output, "ROW_GROUP_SIZE", 2)
+    with_probs = [dict(r, probabilities=[0.5, 0.5]) for r in RESULTS[:3]]
+
+    # Rows without probabilities after rows with them: NaN vectors, same schema
+    with output.open_writer("parquet", tmp_path / "a.parquet", class_names=["acne", "eczema"]) as writer:
+        writer.write_many(with_probs + RESULTS[:3])
+    vectors = pq.read_table(tmp_path / "a.parquet").column("probabilities").to_pylist()
+    assert vectors[0] == [0.5, 0.5] and all(v != v for v in vectors[4])
+
+    # Columns the first row didn't have are rejected rather than dropped
+    with pytest.raises(ValueError, match="probabilities"):
+        with output.open_writer("parquet", tmp_path / "b.parquet") as writer:
+            writer.write_many(RESULTS[:3] + with_probs)
@@ -0,0 +1,395 @@
+# dermaai_cli/tests/test_predict.py
+import itertools
+import json
+
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+from PIL import Image, UnidentifiedImageError
+from torchvision.models import resnet18
+
+from dermaai_cli.core import inference
+
+NUM_CLASSES = 5
+
+
+@pytest.fixture
+def model_files(tmp_path):
+    torch.manual_seed(0)
+    model = resnet18(weights=None)
+    model.fc = nn.Linear(model.fc.in_features, NUM_CLASSES)
+    model_path = tmp_path / "dermai_model_v1.pth"
+    labels_path = tmp_path / "classes_v1.txt"
+    torch.save(model.state_dict(), model_path)
+    labels_path.write_text("\n".join(f"class_{i}" for i in range(NUM_CLASSES)) + "\n")
+    return model_path, labels_path
+
+
+@pytest.fixture
+def images(tmp_path):
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(7):
+        path = tmp_path / f"img_{i}.jpg"
+        Image.fromarray(rng.integers(0, 255, (240 + i, 320, 3), dtype=np.uint8)).save(path)
+        paths.append(path)
+    return paths
+
+
+def test_batched_inference_matches_single_image(model_files, images, tmp_path):
+    bundle = inference.load_model(*model_files)
+    paths = images[:3] + [tmp_path / "missing.jpg"] + images[3:]
+
+    single = list(inference.run_inference(bundle, paths, batch_size=1))
+    batched = list(inference.run_inference(bundle, paths, batch_size=4))
+
+    assert [r["image"] for r in batched] == [str(p) for p in paths]
+    assert [r["prediction"] for r in batched] == [r["prediction"] for r in single]
+    assert batched[3] == {"image": str(paths[3]), "prediction": "❌ File not found", "confidence": 0}
+    for b, s in zip(batched, single):
+        assert b["confidence"] == pytest.approx(s["confidence"], abs=1e-3)
+
+
+def test_prefetch_pipeline_preserves_order(images, tmp_path):
+    paths = images + [tmp_path / "missing.jpg"] + images[:2]
+    seen = list(inference.iter_preprocessed(paths, num_workers=3, prefetch=2))
+
+    assert [p for p, _ in seen] == paths
+    assert seen[len(images)][1] is None
+    assert torch.equal(seen[0][1], inference.preprocess_image(images[0]))
+
+
+def test_onnx_engine_matches_torch(model_files, images):
+    pytest.importorskip("onnxruntime")
+    from dermaai_cli.core import onnx_engine
+
+    model_path, labels_path = model_files
+    torch_bundle = inference.load_model(model_path, labels_path)
+    onnx_engine.export_onnx(torch_bundle[0], onnx_engine.onnx_path_for(model_path))
+    onnx_bundle = inference.load_model(model_path, labels_path, engine="onnx")
+
+    expected = list(inference.run_inference(torch_bundle, images, batch_size=4))
+    actual = list(inference.run_inference(onnx_bundle, images, batch_size=4))
+    assert [r["prediction"] for r in actual] == [r["prediction"] for r in expected]
+
+
+def test_prediction_cache_skips_repeat_images(model_files, images, tmp_path):
+    from dermaai_cli.core.prediction_cache import PredictionCache
+
+    bundle = inference.load_model(*model_files)
+    cache = PredictionCache("v1/torch", path=tmp_path / "cache.db", max_entries=4)
+    first = list(inference.run_inference(bundle, images[:3], cache=cache))
+    again = list(inference.run_inference(bundle, images[:3], cache=cache))
+
+    assert again == first
+    assert (cache.hits, cache.misses) == (3, 3)
+    other_model = PredictionCache("v2/torch", path=tmp_path / "cache.db")
+    assert other_model.get(cache._db.execute("SELECT digest FROM predictions").fetchone()[0]) is None
+
+    list(inference.run_inference(bundle, images, cache=cache))  # 7 distinct images > max_entries
+    (count,) = cache._db.execute("SELECT COUNT(*) FROM predictions").fetchone()
+    assert count <= 4
+
+
+def test_prediction_cache_hits_leave_the_database_unlocked(model_files, images, tmp_path):
+    import sqlite3
+    from dermaai_cli.core.prediction_cache import PredictionCache
+
+    bundle = inference.load_model(*model_files)
+    cache = PredictionCache("v1/torch", path=tmp_path / "cache.db")
+    list(inference.run_inference(bundle, images[:2], cache=cache))
+    (digest,) = cache._db.execute("SELECT digest FROM predictions").fetchone()
+    assert cache.get(digest) is not None  # a hit in the middle of a run
+
+    other = sqlite3.connect(tmp_path / "cache.db", timeout=0.1)  # e.g. a second `predict run`
+    with other:
+        other.execute("DELETE FROM predictions WHERE model_key = 'v9/torch'")
+    cache.close()
+
+
+def test_cached_run_names_undecodable_file(model_files, tmp_path):
+    from dermaai_cli.core.prediction_cache import PredictionCache
+
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not an image")
+    bundle = inference.load_model(*model_files)
+    cache = PredictionCache("v1/torch", path=tmp_path / "cache.db")
+    with pytest.raises(UnidentifiedImageError, match="broken.jpg"):
+        list(inference.run_inference(bundle, [broken], cache=cache))
+    cache.close()
+
+
+def test_cache_key_changes_when_model_files_are_replaced(model_files, tmp_path, monkeypatch):
+    import os
+    from dermaai_cli.core import model_manager, prediction_cache
+    from dermaai_cli.core.model_pool import cache_key
+
+    monkeypatch.setattr(model_manager, "MODELS_DIR", tmp_path)  # model_files are installed here
+    model_path, labels_path = model_files
+    key = cache_key(1)
+    assert key.startswith("v1/torch@") and cache_key(1) == key
+
+    cache = prediction_cache.PredictionCache(key, path=tmp_path / "cache.db")
+    cache.put_many([("digest", "class_0", 0.9)])
+    torch.save(resnet18(weights=None).state_dict(), model_path)  # e.g. re-downloaded weights
+    new_key = cache_key(1)
+    assert new_key != key
+    assert prediction_cache.PredictionCache(new_key, path=tmp_path / "cache.db").get("digest") is None
+
+    stat = labels_path.stat()
+    labels_path.write_text(labels_path.read_text().replace("class_0", "class_x"))
+    os.utime(labels_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert cache_key(1) != new_key
+
+    cache.close()
+    assert prediction_cache.forget_model(1, path=tmp_path / "cache.db") == 1
+
+
+def test_run_inference_streams_from_unbounded_source(model_files, images):
+    bundle = inference.load_model(*model_files)
+    results = inference.run_inference(bundle, itertools.cycle(images), batch_size=2, prefetch=4)
+    first = list(itertools.islice(results, 5))
+    assert [r["image"] for r in first] == [str(p) for p in images[:5]]
+
+
+def test_image_sources(images, tmp_path):
+    from dermaai_cli.core import sources
+
+    nested = tmp_path / "nested"
+    nested.mkdir()
+    (nested / "deep.PNG").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("not an image")
+    found = set(sources.iter_dir(tmp_path))
+    assert found == set(images) | {nested / "deep.PNG"}
+    assert nested / "deep.PNG" not in set(sources.iter_dir(tmp_path, recursive=False))
+
+    text_manifest = tmp_path / "list.txt"
+    text_manifest.write_text(f"{images[0]}\n\n{images[1]}\n")
+    json_manifest = tmp_path / "list.json"
+    json_manifest.write_text(json.dumps({"images": [str(images[2])]}))
+    paths = sources.iter_image_paths(
+        images=[images[3]], manifests=[text_manifest, json_manifest],
+        patterns=[str(tmp_path / "img_6.*")],
+    )
+    assert list(paths) == [images[3], images[0], images[1], images[2], images[6]]
+
+
+def test_job_journal_resumes_after_interruption(tmp_path):
+    from dermaai_cli.core.jobs import JobJournal, journal_path_for
+
+    path = journal_path_for(tmp_path / "results.csv")
+    assert path.name == "results.csv.journal"
+
+    journal = JobJournal(path, "v1/torch").open()
+    journal.record({"image": "a.jpg", "prediction": "class_0", "confidence": 90.0})
+    journal.record({"image": "b.jpg", "prediction": "class_1", "confidence": 80.0})
+    journal.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"image": "c.jp')  # killed mid-write
+
+    resumed = JobJournal(path, "v1/torch")
+    assert list(resumed.load()) == ["a.jpg", "b.jpg"]
+    resumed.open(resume=True)
+    resumed.record({"image": "c.jpg", "prediction": "class_2", "confidence": 70.0})
+    resumed.close()
+    assert list(JobJournal(path, "v1/torch").load()) == ["a.jpg", "b.jpg", "c.jpg"]
+
+    with pytest.raises(ValueError):
+        JobJournal(path, "v2/torch").load()
+
+
+def test_safetensors_weights_are_preferred_unless_stale(model_files, images, monkeypatch):
+    pytest.importorskip("safetensors")
+    import os
+    from dermaai_cli.core import weights
+
+    model_path, labels_path = model_files
+    expected = list(inference.run_inference(inference.load_model(model_path, labels_path), images))
+
+    converted = weights.convert_to_safetensors(model_path)
+    assert weights.resolve_weights(model_path) == converted
+    actual = list(inference.run_inference(inference.load_model(model_path, labels_path), images))
+    assert actual == expected
+
+    weights.convert_to_safetensors(model_path, fp16=True)
+    fp16 = list(inference.run_inference(inference.load_model(model_path, labels_path), images))
+    for a, e in zip(fp16, expected):
+        assert a["confidence"] == pytest.approx(e["confidence"], abs=0.1)
+
+    # A newer .pth (e.g. after `dermai sync`) wins over the old conversion
+    os.utime(model_path, (converted.stat().st_mtime + 10,) * 2)
+    assert weights.resolve_weights(model_path) == model_path
+
+    # Without the safetensors package the .pth is used even when it's older
+    os.utime(model_path, (1, 1))
+    assert weights.resolve_weights(model_path) == converted
+    monkeypatch.setattr(weights, "safetensors_available", lambda: False)
+    assert weights.resolve_weights(model_path) == model_path
+    inference.load_model(model_path, labels_path)
+
+
+def test_reduced_decode_matches_full_decode(model_files, tmp_path):
+    # Smooth "photo" at phone resolution, saved as JPEG and PNG
+    y, x = np.mgrid[0:1800:1, 0:2400:1]
+    rng = np.random.default_rng(1)
+    photo = np.stack([x / 2400 * 255, y / 1800 * 255, (x + y) % 512 / 2], axis=-1)
+    photo = (photo + rng.integers(0, 20, photo.shape)).clip(0, 255).astype(np.uint8)
+    paths = [tmp_path / "large.jpg", tmp_path / "large.png"]
+    for path in paths:
+        Image.fromarray(photo).save(path)
+
+    model, class_names = inference.load_model(*model_files)
+    for path in paths:
+        image = inference.open_image(path)
+        assert image.width < 1200 and image.height < 900  # not decoded at full size
+        reduced = inference.preprocess_image(path)
+        full = inference.transform(Image.open(path).convert("RGB"))
+        assert (reduced - full).abs().mean() < 0.02
+
+        pred_reduced, conf_reduced = inference.predict_batch(model, reduced.unsqueeze(0), class_names)[0]
+        pred_full, conf_full = inference.predict_batch(model, full.unsqueeze(0), class_names)[0]
+        assert pred_reduced == pred_full
+        assert conf_reduced == pytest.approx(conf_full, abs=0.01)
+
+
+def test_profiler_records_stages_and_trace(model_files, images, tmp_path):
+    from dermaai_cli.core.profiler import Profiler
+
+    profiler = Profiler()
+    bundle = inference.load_model(*model_files)
+    results = list(inference.run_inference(bundle, images, batch_size=4, profiler=profiler))
+    assert len(results) == len(images)
+
+    summary = profiler.summary()
+    assert summary["decode"]["count"] == summary["transform"]["count"] == len(images)
+    assert summary["forward"]["count"] == 2
+    assert sum(count for _, count in profiler.histogram("image")) == len(images)
+
+    trace_path = tmp_path / "trace.json"
+    profiler.write_chrome_trace(trace_path)
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    assert {e["name"] for e in events if e["ph"] == "X"} == {"decode", "transform", "forward", "image"}
+
+
+def test_sharded_inference_matches_single_process(model_files, images, tmp_path):
+    from dermaai_cli.core import sharding
+
+    bundle = inference.load_model(*model_files)
+    paths = images + [tmp_path / "missing.jpg"] + images[:2]
+
+    single = list(inference.run_inference(bundle, paths, batch_size=2))
+    sharded = list(sharding.run_sharded(bundle, paths, workers=2, threads=1, batch_size=2))
+
+    assert [r["image"] for r in sharded] == [str(p) for p in paths]
+    assert [r["prediction"] for r in sharded] == [r["prediction"] for r in single]
+    for a, b in zip(sharded, single):
+        assert a["confidence"] == pytest.approx(b["confidence"], abs=1e-3)
+
+
+def test_comparison_feeds_each_decoded_batch_to_every_model(model_files, images, tmp_path, monkeypatch):
+    from dermaai_cli.core import comparison
+
+    first = inference.load_model(*model_files)
+    torch.manual_seed(1)
+    other = resnet18(weights=None)
+    other.fc = nn.Linear(other.fc.in_features, NUM_CLASSES)
+    second = (other.eval(), first[1])
+
+    decodes = []
+    preprocess = inference.preprocess_image
+    monkeypatch.setattr(inference, "preprocess_image", lambda path, *a: decodes.append(path) or preprocess(path, *a))
+    paths = images + [tmp_path / "missing.jpg"]
+    rows = list(comparison.run_comparison({"v1": first, "v2": second}, paths, batch_size=3))
+
+    assert len(decodes) == len(images)
+    assert [r["image"] for r in rows] == [str(p) for p in paths]
+    for row, single in zip(rows, inference.run_inference(first, images, batch_size=3)):
+        assert row["prediction_v1"] == single["prediction"]
+        assert row["agreement"] == ("agree" if row["prediction_v1"] == row["prediction_v2"] else "disagree")
+    assert rows[-1]["agreement"] == "missing"
+
+    summary = comparison.AgreementSummary(["v1", "v2"])
+    for row in rows:
+        summary.add(row)
+    assert summary.scored == len(images)
+    assert summary.matches["v2"] + sum(summary.changes["v2"].values()) == len(images)
+
+
+@pytest.mark.parametrize("mode", ["static", "dynamic"])
+def test_quantize_registers_a_variant_that_reloads(mode, model_files, images, tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+    from dermaai_cli.commands import models
+    from dermaai_cli.core import model_manager, quantization
+
+    monkeypatch.setattr(model_manager, "MODELS_DIR", tmp_path)  # model_files are installed here
+    monkeypatch.setattr(model_manager, "INDEX_FILE", tmp_path / "model_index.json")
+    result = CliRunner().invoke(
+        models.app, ["quantize", "1", "--calibration-dir", str(tmp_path), "--mode", mode, "--batch-size", "4"]
+    )
+    assert result.exit_code == 0, result.output
+
+    variant = model_manager.get_model_variant(1, quantization.VARIANT_NAMES[mode])
+    assert variant["mode"] == mode
+    assert variant["calibration_images"] == len(images)
+    assert 0 <= variant["top1_agreement"] <= 1 and variant["speedup"] > 0
+
+    # The round trip `predict run --variant` takes
+    int8_model, class_names = inference.load_model(
+        variant["path"], model_files[1], quantization_mode=mode, qengine=variant["qengine"]
+    )
+    fp32_model, _ = inference.load_model(*model_files)
+    batch = torch.stack([inference.preprocess_image(p) for p in images])
+    batches = [batch[:4], batch[4:]]
+    report = quantization.compare_models(fp32_model, int8_model, batches)
+    assert report["top1_agreement"] == pytest.approx(variant["top1_agreement"], abs=1e-4)
+    assert len(inference.predict_batch(int8_model, batch, class_names)) == len(images)
+
+
+def test_resume_keeps_input_order_and_rechecks_missing_files(model_files, images, tmp_path, monkeypatch):
+    from typer.testing import CliRunner
+    from dermaai_cli.commands import predict
+    from dermaai_cli.core import config, jobs, model_manager
+
+    monkeypatch.setattr(model_manager, "MODELS_DIR", tmp_path)  # model_files are installed here
+    monkeypatch.setattr(model_manager, "INDEX_FILE", tmp_path / "model_index.json")
+    late = tmp_path / "late.jpg"  # missing when the interrupted run reached it
+    journal = jobs.JobJournal(jobs.journal_path_for(tmp_path / "results.csv"), config.model_key(1))
+    journal.open()
+    for path in (images[1], images[3]):
+        journal.record({"image": str(path), "prediction": "journaled", "confidence": 0.5})
+    journal.record({"image": str(late), "prediction": jobs.FILE_NOT_FOUND, "confidence": 0})
+    journal.close()
+    Image.new("RGB", (64, 64)).save(late)
+
+    paths = images[:5] + [late]
+    result = CliRunner().invoke(predict.app, [
+        "--model-version", "1", *(arg for p in paths for arg in ("--images", str(p))), "--output-path", str(tmp_path),
+        "--output-format", "csv", "--no-daemon", "--no-cache", "--resume",
+    ])
+    assert result.exit_code == 0, result.output
+
+    import pandas as pd
+    rows = pd.read_csv(tmp_path / "results.csv")
+    assert list(rows["image"]) == [str(p) for p in paths]
+    assert list(rows["prediction"] == "journaled") == [False, True, False, True, False, False]
+    assert rows["prediction"].iloc[-1].startswith("class_")
+
+
+def test_resume_refuses_a_journal_written_without_probabilities(images, tmp_path):
+    pytest.importorskip("pyarrow")
+    from typer.testing import CliRunner
+    from dermaai_cli.commands import predict
+    from dermaai_cli.core import config, jobs
+
+    journal = jobs.JobJournal(jobs.journal_path_for(tmp_path / "results.parquet"), config.model_key(1))
+    journal.open()
+    journal.record({"image": str(images[0]), "prediction": "class_0", "confidence": 0.5})
+    journal.close()
+
+    result = CliRunner().invoke(predict.app, [
+        "--model-version", "1", "--images", str(images[1]), "--output-path", str(tmp_path),
+        "--output-format", "parquet", "--probabilities", "--resume",
+    ])
+    assert result.exit_code == 1
+    assert "+probabilities" in result.output
@@ -0,0 +1,82 @@
+# dermaai_cli/tests/test_server.py
+import threading
+import time
+
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+from PIL import Image
+
+from dermaai_cli.core import client, inference, model_pool, server as server_module
+from dermaai_cli.core.server import InferenceServer
+
+CLASSES = ["nevus", "melanoma", "bcc"]
+
+
+def _tiny_bundle():
+    """Linear model over the mean colour: enough to give different images different predictions"""
+    torch.manual_seed(0)
+    model = nn.Sequential(nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(3, len(CLASSES)))
+    return model.eval(), CLASSES
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    bundle = _tiny_bundle()
+    monkeypatch.setattr(model_pool, "load_bundle", lambda version, engine="torch", variant=None: bundle)
+    monkeypatch.setattr(server_module, "cache_key", lambda version, engine="torch", variant=None: f"v{version}/{engine}@test")
+    server = InferenceServer("127.0.0.1", 0, cache_path=tmp_path / "cache.db")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", bundle
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_keeps_order_across_chunks_and_counts_cache(daemon, tmp_path, monkeypatch):
+    url, bundle = daemon
+    monkeypatch.setattr(client, "CHUNK_SIZE", 3)
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(8):
+        path = tmp_path / f"img_{i}.jpg"
+        Image.new("RGB", (64, 48), tuple(int(c) for c in rng.integers(0, 255, 3))).save(path)
+        paths.append(path)
+    paths.insert(4, tmp_path / "missing.jpg")
+
+    expected = list(inference.run_inference(bundle, paths, batch_size=2))
+    first_stats = {}
+    first = list(client.predict(url, paths, 1, batch_size=2, cache_stats=first_stats))
+    second = list(client.predict(url, paths, 1, batch_size=2))
+
+    for results in (first, second):
+        assert [r["image"] for r in results] == [str(p) for p in paths]
+        assert [r["prediction"] for r in results] == [r["prediction"] for r in expected]
+    assert first_stats == {"hits": 0, "misses": 8}
+
+    stats = client.stats(url)
+    assert stats["cache"] == {"hits": 8, "misses": 8}
+    assert stats["requests"]["predict"] == 6  # 9 paths in chunks of 3, twice
+    assert stats["images"] == {"v1/torch": 18}
+
+
+def test_concurrent_gets_load_a_model_once(monkeypatch):
+    loads = []
+
+    def slow_load(version, engine="torch", variant=None):
+        loads.append(version)
+        time.sleep(0.2)
+        return object(), CLASSES
+
+    monkeypatch.setattr(model_pool, "load_bundle", slow_load)
+    pool = model_pool.ModelPool(max_models=2)
+    bundles = []
+    threads = [threading.Thread(target=lambda: bundles.append(pool.get(3))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loads == [3]
+    assert len(bundles) == 8 and all(b is bundles[0] for b in bundles)
@@ -0,0 +1,57 @@
+# dermaai_cli/tests/test_startup.py
+# Start-up budget guard: help screens and light commands must not import the
+# heavy inference/report stack. Run with -s to see the measured times.
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+HEAVY_MODULES = ("torch", "torchvision", "pandas", "reportlab", "requests", "onnxruntime", "safetensors")
+# Wall-clock budget per command (generous for slow CI boxes; override via env)
+STARTUP_BUDGET_S = float(os.environ.get("DERMAI_STARTUP_BUDGET_S", "3.0"))
+
+# Runs the CLI and reports which heavy modules it imported on the way out
+PROBE = (
+    "import atexit, sys\n"
+    f"heavy = {HEAVY_MODULES!r}\n"
+    "atexit.register(lambda: print('LOADED=' + ','.join(m for m in heavy if m in sys.modules)))\n"
+    "from dermaai_cli.cli import main\n"
+    "sys.argv = ['dermai'] + sys.argv[1:]\n"
+    "main()\n"
+)
+
+COMMANDS = [
+    ["--help"],
+    ["get-models"],
+    ["predict", "run", "--help"],
+    ["model-info", "--help"],
+    ["download-model", "--help"],
+    ["sync", "--help"],
+    ["export-onnx", "--help"],
+    ["convert-weights", "--help"],
+    ["benchmark", "--help"],
+    ["quantize", "--help"],
+    ["start", "--help"],
+    ["serve", "--help"],
+    ["serve-status", "--help"],
+]
+
+
+@pytest.mark.parametrize("args", COMMANDS, ids=" ".join)
+def test_command_starts_without_heavy_imports(args, tmp_path):
+    env = dict(os.environ, HOME=str(tmp_path), USERPROFILE=str(tmp_path))
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE, *args],
+        cwd=Path(__file__).parents[2], env=env, capture_output=True, text=True, timeout=60,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"dermai {' '.join(args)}: {elapsed:.2f}s")
+
+    assert proc.returncode == 0, proc.stderr
+    loaded = proc.stdout.rsplit("LOADED=", 1)[1].strip()
+    assert loaded == "", f"imported heavy modules at start-up: {loaded}"
+    assert elapsed < STARTUP_BUDGET_S
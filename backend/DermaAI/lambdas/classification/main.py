@@ -1,15 +1,21 @@
+import io
 import os
 import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import boto3
+from botocore.config import Config
 import torch
 import torch.nn as nn
 from torchvision.models import resnet18
 from torchvision import transforms
-from PIL import Image
-import tempfile
+from PIL import Image, UnidentifiedImageError
 
-# AWS clients
-s3 = boto3.client("s3")
+# Concurrent image downloads; the S3 client's connection pool is sized to match
+IMAGE_FETCH_WORKERS = int(os.environ.get("IMAGE_FETCH_WORKERS", 8))
+
+# AWS clients (boto3 clients are thread-safe and shared by the fetch threads)
+s3 = boto3.client("s3", config=Config(max_pool_connections=max(10, IMAGE_FETCH_WORKERS)))
 dynamodb = boto3.resource("dynamodb")
 sqs = boto3.client("sqs")
 
@@ -17,10 +23,22 @@ sqs = boto3.client("sqs")
 MODEL_BUCKET = os.environ["MODEL_BUCKET"]
 RESULTS_TABLE = os.environ["RESULTS_TABLE"]
 OUTPUT_QUEUE = os.environ["OUTPUT_QUEUE"]
+IMAGE_BUCKET = os.environ.get("IMAGE_BUCKET", "dermaai-request-images-bucket")
+# "torch" (eager .pth) or "onnx" (dermai_model_v<N>.onnx exported with `dermai export-onnx`)
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "torch")
+# Torch engine weights: "pth" (pickled state dict) or "safetensors"
+# (dermai_model_v<N>.safetensors from `dermai convert-weights`, fp32 or fp16)
+WEIGHTS_FORMAT = os.environ.get("WEIGHTS_FORMAT", "pth")
 
 # Dynamo table reference
 table = dynamodb.Table(RESULTS_TABLE)
 
+# Warm-container caches, kept across invocations of the same container.
+# Models are evicted least-recently-used once their weights exceed the budget.
+MODEL_CACHE_MAX_BYTES = int(os.environ.get("MODEL_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+_model_cache = OrderedDict()  # model_version -> {"etag", "labels_etag", "model", "nbytes"}
+_labels_cache = {}  # {"etag", "class_names"}
+
 # Preprocessing (same as training)
 transform = transforms.Compose([
     transforms.Resize((224, 224)),
@@ -30,41 +48,161 @@ transform = transforms.Compose([
 ])
 
 
+# Phone photos are decoded near this size (JPEG draft mode) instead of at full resolution
+DECODE_SIZE = (448, 448)
+
+
+def open_image(buffer):
+    """Open an uploaded image as RGB, decoding large JPEGs at 1/2..1/8 scale"""
+    image = Image.open(buffer)
+    if image.format == "JPEG":
+        image.draft("RGB", DECODE_SIZE)
+    image = image.convert("RGB")
+    factor = min(image.width // DECODE_SIZE[0], image.height // DECODE_SIZE[1])
+    if factor >= 2:  # non-JPEG, or a JPEG still larger than 8x DECODE_SIZE
+        image = image.reduce(factor)
+    return image
+
+
+def _s3_etag(key: str):
+    """Cheap staleness check: ETag of an object in the model bucket"""
+    return s3.head_object(Bucket=MODEL_BUCKET, Key=key)["ETag"]
+
+
 def load_labels_from_s3():
-    """Download and load labels.txt from model bucket"""
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        s3.download_file(MODEL_BUCKET, "classes.txt", tmp.name)
-        with open(tmp.name, "r") as f:
-            return [line.strip() for line in f.readlines()]
+    """Load classes.txt from model bucket, re-downloading only if its ETag changed"""
+    etag = _s3_etag("classes.txt")
+    if _labels_cache.get("etag") != etag:
+        body = s3.get_object(Bucket=MODEL_BUCKET, Key="classes.txt")["Body"].read()
+        _labels_cache["class_names"] = [line.strip() for line in body.decode("utf-8").splitlines()]
+        _labels_cache["etag"] = etag
+    return _labels_cache["class_names"]
+
+
+class OnnxModel:
+    """ONNX Runtime CPU session called like the eager model: tensor batch in, logits tensor out"""
+
+    def __init__(self, model_bytes: bytes):
+        import onnxruntime as ort  # only needed (and installed) for INFERENCE_ENGINE=onnx
+        self.session = ort.InferenceSession(model_bytes, providers=["CPUExecutionProvider"])
+        self.nbytes = len(model_bytes)
+
+    def __call__(self, batch):
+        return torch.from_numpy(self.session.run(["logits"], {"input": batch.contiguous().numpy()})[0])
+
+
+def _model_key(model_version: int):
+    extension = "onnx" if INFERENCE_ENGINE == "onnx" else WEIGHTS_FORMAT
+    return f"dermai_model_v{model_version}.{extension}"
+
+
+def _load_state_dict(body: bytes):
+    if WEIGHTS_FORMAT == "safetensors":
+        from safetensors.torch import load  # no unpickling; only needed for this format
+        state_dict = load(body)
+    else:
+        state_dict = torch.load(io.BytesIO(body), map_location="cpu")
+    # fp16-on-disk weights are computed in float32
+    return {k: v.float() if v.dtype == torch.float16 else v for k, v in state_dict.items()}
 
 
 def load_model_from_s3(model_version: int, num_classes: int):
-    """Download model weights from S3 and load into ResNet18"""
-    key = f"dermai_model_v{model_version}.pth"
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        s3.download_file(MODEL_BUCKET, key, tmp.name)
+    """Download model weights from S3 and load into ResNet18 (or an ONNX Runtime session)"""
+    body = s3.get_object(Bucket=MODEL_BUCKET, Key=_model_key(model_version))["Body"].read()
+    if INFERENCE_ENGINE == "onnx":
+        return OnnxModel(body)
+    state_dict = _load_state_dict(body)
+    del body
+    # Built on the meta device and given the loaded tensors directly: no random init, no copy
+    with torch.device("meta"):
         model = resnet18(weights=None)
         model.fc = nn.Linear(model.fc.in_features, num_classes)
-        model.load_state_dict(torch.load(tmp.name, map_location="cpu"))
-        model.eval()
-        return model
-
-
-def predict_images(model, image_paths, class_names):
-    """Run predictions for one or multiple images"""
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+    return model
+
+
+def _model_nbytes(model):
+    if isinstance(model, OnnxModel):
+        return model.nbytes
+    return sum(t.numel() * t.element_size() for t in model.state_dict().values())
+
+
+def get_model(model_version: int):
+    """
+    Return (model, class_names) from the warm cache, rebuilding the model only
+    when its weights or the labels changed in S3 (compared by ETag).
+    """
+    class_names = load_labels_from_s3()
+    etag = _s3_etag(_model_key(model_version))
+    entry = _model_cache.get(model_version)
+    if entry and entry["etag"] == etag and entry["labels_etag"] == _labels_cache["etag"]:
+        _model_cache.move_to_end(model_version)
+        return entry["model"], class_names
+
+    model = load_model_from_s3(model_version, len(class_names))
+    _model_cache[model_version] = {
+        "etag": etag,
+        "labels_etag": _labels_cache["etag"],
+        "model": model,
+        "nbytes": _model_nbytes(model),
+    }
+    _model_cache.move_to_end(model_version)
+
+    # Evict least recently used models over budget (always keep the current one)
+    while len(_model_cache) > 1 and sum(e["nbytes"] for e in _model_cache.values()) > MODEL_CACHE_MAX_BYTES:
+        _model_cache.popitem(last=False)
+    return model, class_names
+
+
+def fetch_images(image_keys):
+    """
+    Download images concurrently straight into memory.
+    Returns [(key, buffer, error)] in input order; buffer is None when the key failed.
+    """
+    def fetch(key):
+        try:
+            body = s3.get_object(Bucket=IMAGE_BUCKET, Key=key)["Body"].read()
+            return key, io.BytesIO(body), None
+        except Exception as e:
+            return key, None, str(e)
+
+    if not image_keys:
+        return []
+    with ThreadPoolExecutor(max_workers=min(IMAGE_FETCH_WORKERS, len(image_keys))) as pool:
+        return list(pool.map(fetch, image_keys))
+
+
+def predict_images(model, images, class_names):
+    """
+    Run predictions for fetched images (see fetch_images) in one batched forward pass.
+    Keys that failed to download or decode are reported with an "error" instead.
+    """
     results = []
-    for img_path in image_paths:
-        image = Image.open(img_path).convert("RGB")
-        tensor = transform(image).unsqueeze(0)  # add batch dimension
+    tensors = []  # (index in results, tensor)
+    for key, buffer, error in images:
+        if buffer is not None:
+            try:
+                image = open_image(buffer)
+                tensors.append((len(results), transform(image)))
+            except UnidentifiedImageError:  # its message embeds the in-memory buffer's repr
+                error = f"Could not decode image {key}: unrecognised image format"
+            except Exception as e:
+                error = f"Could not decode image {key}: {e}"
+        results.append({"image": key, "error": error} if error else None)
+
+    if tensors:
         with torch.no_grad():
-            outputs = model(tensor)
-            probs = torch.softmax(outputs, dim=1)[0]
-            pred_idx = torch.argmax(probs).item()
-            confidence = probs[pred_idx].item()
-        results.append({
-            "prediction": class_names[pred_idx],
-            "confidence": f"{confidence:.2%}"
-        })
+            outputs = model(torch.stack([tensor for _, tensor in tensors]))
+            probs = torch.softmax(outputs, dim=1)
+            pred_idxs = torch.argmax(probs, dim=1)
+            confidences = probs.gather(1, pred_idxs.unsqueeze(1)).squeeze(1)
+        for (idx, _), pred_idx, confidence in zip(tensors, pred_idxs.tolist(), confidences.tolist()):
+            results[idx] = {
+                "image": images[idx][0],
+                "prediction": class_names[pred_idx],
+                "confidence": f"{confidence:.2%}"
+            }
     return results
 
 
@@ -76,26 +214,25 @@ def handler(event, context):
         model_version = body.get("Model_version", 3)
         image_keys = body.get("Images", [])
 
-        # Load labels + model
-        class_names = load_labels_from_s3()
-        model = load_model_from_s3(model_version, len(class_names))
+        # Load labels + model (cached across warm invocations)
+        model, class_names = get_model(model_version)
 
-        # Download images from S3
-        local_paths = []
-        for key in image_keys:
-            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
-            s3.download_file("dermaai-request-images-bucket", key, tmp.name)
-            local_paths.append(tmp.name)
+        # Download images from S3 (concurrently, in memory)
+        images = fetch_images(image_keys)
 
-        # Run predictions
-        predictions = predict_images(model, local_paths, class_names)
+        # Run predictions (failed keys come back with an "error" entry)
+        predictions = predict_images(model, images, class_names)
+        failed = sum(1 for p in predictions if "error" in p)
+        if failed:
+            print(f"⚠️ {failed}/{len(predictions)} images could not be classified")
+        request_state = "Failed" if predictions and failed == len(predictions) else "Processed"
 
         # Update DynamoDB
         table.update_item(
             Key={"Request_Id": request_id},
             UpdateExpression="SET Request_state = :s, Predictions = :p, Model_version = :m",
             ExpressionAttributeValues={
-                ":s": "Processed",
+                ":s": request_state,
                 ":p": predictions,
                 ":m": model_version
             }
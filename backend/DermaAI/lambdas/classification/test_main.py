@@ -0,0 +1,137 @@
+# lambdas/classification/test_main.py
+# Runs the handler module against moto's in-memory S3/DynamoDB/SQS.
+import importlib.util
+import io
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+import torch
+import torch.nn as nn
+from PIL import Image
+from torchvision.models import resnet18
+
+boto3 = pytest.importorskip("boto3")
+mock_aws = pytest.importorskip("moto").mock_aws
+
+CLASSES = ["nevus", "melanoma", "bcc"]
+
+
+def _weights(seed):
+    torch.manual_seed(seed)
+    model = resnet18(weights=None)
+    model.fc = nn.Linear(model.fc.in_features, len(CLASSES))
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    for name, value in {
+        "AWS_DEFAULT_REGION": "us-east-1", "AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing",
+        "MODEL_BUCKET": "models", "IMAGE_BUCKET": "images", "RESULTS_TABLE": "results",
+    }.items():
+        monkeypatch.setenv(name, value)
+    with mock_aws():
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket="models")
+        s3.create_bucket(Bucket="images")
+        s3.put_object(Bucket="models", Key="classes.txt", Body="\n".join(CLASSES).encode())
+        boto3.client("dynamodb").create_table(
+            TableName="results", BillingMode="PAY_PER_REQUEST",
+            KeySchema=[{"AttributeName": "Request_Id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "Request_Id", "AttributeType": "S"}],
+        )
+        sqs = boto3.client("sqs")
+        monkeypatch.setenv("OUTPUT_QUEUE", sqs.create_queue(QueueName="descriptions")["QueueUrl"])
+
+        # Imported inside the mock: the module creates its AWS clients at import time
+        spec = importlib.util.spec_from_file_location("classification_main", Path(__file__).with_name("main.py"))
+        main = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(main)
+
+        builds = []
+        load_model_from_s3 = main.load_model_from_s3
+        monkeypatch.setattr(main, "load_model_from_s3", lambda *a: builds.append(a[0]) or load_model_from_s3(*a))
+        yield SimpleNamespace(main=main, s3=s3, builds=builds)
+
+
+def test_warm_invocations_reuse_the_model(aws):
+    aws.s3.put_object(Bucket="models", Key="dermai_model_v3.pth", Body=_weights(0))
+
+    model, class_names = aws.main.get_model(3)
+    assert aws.main.get_model(3) == (model, class_names)
+    assert class_names == CLASSES
+    assert aws.builds == [3]
+
+
+def test_changed_etag_reloads_the_model(aws):
+    aws.s3.put_object(Bucket="models", Key="dermai_model_v3.pth", Body=_weights(0))
+    first, _ = aws.main.get_model(3)
+
+    aws.s3.put_object(Bucket="models", Key="dermai_model_v3.pth", Body=_weights(1))
+    second, _ = aws.main.get_model(3)
+
+    assert aws.builds == [3, 3]
+    assert second is not first
+    assert not torch.equal(first.fc.weight, second.fc.weight)
+
+
+def test_least_recently_used_model_is_evicted(aws, monkeypatch):
+    for version in (1, 2, 3):
+        aws.s3.put_object(Bucket="models", Key=f"dermai_model_v{version}.pth", Body=_weights(version))
+    aws.main.get_model(1)
+    model_bytes = aws.main._model_cache[1]["nbytes"]
+    monkeypatch.setattr(aws.main, "MODEL_CACHE_MAX_BYTES", 2 * model_bytes)  # room for two models
+
+    aws.main.get_model(2)
+    aws.main.get_model(1)  # 2 is now the least recently used
+    aws.main.get_model(3)
+
+    assert list(aws.main._model_cache) == [1, 3]
+    aws.main.get_model(1)
+    assert aws.builds == [1, 2, 3]
+
+
+def _jpeg(seed):
+    buffer = io.BytesIO()
+    pixels = np.random.default_rng(seed).integers(0, 255, (300, 400, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _invoke(aws, request_id, keys):
+    event = {"Records": [{"body": json.dumps({"Request_Id": request_id, "Model_version": 3, "Images": keys})}]}
+    response = aws.main.handler(event, None)
+    assert response["statusCode"] == 200, response
+    return aws.main.table.get_item(Key={"Request_Id": request_id})["Item"]
+
+
+def test_failed_images_are_reported_per_key(aws):
+    aws.s3.put_object(Bucket="models", Key="dermai_model_v3.pth", Body=_weights(0))
+    for i in range(3):
+        aws.s3.put_object(Bucket="images", Key=f"ok_{i}.jpg", Body=_jpeg(i))
+    aws.s3.put_object(Bucket="images", Key="broken.jpg", Body=b"not an image")
+    keys = ["ok_0.jpg", "missing.jpg", "ok_1.jpg", "broken.jpg", "ok_2.jpg"]
+
+    item = _invoke(aws, "r1", keys)
+
+    predictions = item["Predictions"]
+    assert item["Request_state"] == "Processed"
+    assert [p["image"] for p in predictions] == keys  # input order kept by the concurrent fetch
+    assert all(predictions[i]["prediction"] in CLASSES for i in (0, 2, 4))
+    assert "NoSuchKey" in predictions[1]["error"]
+    assert predictions[3]["error"] == "Could not decode image broken.jpg: unrecognised image format"
+
+
+def test_request_fails_when_every_image_fails(aws):
+    aws.s3.put_object(Bucket="models", Key="dermai_model_v3.pth", Body=_weights(0))
+    aws.s3.put_object(Bucket="images", Key="broken.jpg", Body=b"not an image")
+
+    item = _invoke(aws, "r2", ["missing.jpg", "broken.jpg"])
+
+    assert item["Request_state"] == "Failed"
+    assert all("error" in p for p in item["Predictions"])
@@ -1,10 +1,17 @@
+import argparse
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from PIL import Image
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='[%(levelname)s] %(message)s')
 
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
 def resize_with_padding(image, desired_size=(224, 224), fill_color=(128, 128, 128)):
     old_size = image.size  # (width, height)
     ratio = min(desired_size[0] / old_size[0], desired_size[1] / old_size[1])
@@ -18,31 +25,122 @@ def resize_with_padding(image, desired_size=(224, 224), fill_color=(128, 128, 12
 
     return new_img
 
-def preprocess_images(input_root, output_root, desired_size=(224, 224)):
+
+def _is_up_to_date(input_path, output_path):
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(input_path)
+    except OSError:  # no output yet
+        return False
+
+
+def find_work(input_root, output_root, force=False):
     """
-    Walks through the input_root directory and processes images,
-    saving them to a mirrored structure in output_root with .jpg extension.
+    Walks input_root and returns ([(input_path, output_path)] to process, skipped count).
+    Outputs mirror the input tree with a .jpg extension; unless force, images
+    whose output is newer than the input are skipped.
     """
+    jobs = []
+    skipped = 0
     for subdir, _, files in os.walk(input_root):
         relative_path = os.path.relpath(subdir, input_root)
         output_dir = os.path.join(output_root, relative_path)
-        os.makedirs(output_dir, exist_ok=True)
 
-        image_files = [f for f in files if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-
-        for file_name in image_files:
+        for file_name in files:
+            if not file_name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
             input_path = os.path.join(subdir, file_name)
             base_name = os.path.splitext(file_name)[0]
             output_path = os.path.join(output_dir, base_name + ".jpg")  # Save all as JPG
+            if not force and _is_up_to_date(input_path, output_path):
+                skipped += 1
+            else:
+                jobs.append((input_path, output_path))
+    return jobs, skipped
+
+
+def process_image(job, desired_size=(224, 224), quality=95):
+    """Resize/pad/re-encode one image; returns an error message or None (runs in a worker process)"""
+    input_path, output_path = job
+    # Written under a temporary name so an interrupted run never leaves a
+    # truncated output that looks up to date
+    tmp_path = output_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with Image.open(input_path) as img:
+            img = img.convert("RGB")  # Ensure 3 channels
+            resized_img = resize_with_padding(img, desired_size)
+            resized_img.save(tmp_path, format="JPEG", quality=quality)
+        os.replace(tmp_path, output_path)
+        return None
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return str(e)
+
+
+def preprocess_images(input_root, output_root, desired_size=(224, 224), workers=None,
+                      force=False, quality=95):
+    """
+    Walks through the input_root directory and processes images in parallel,
+    saving them to a mirrored structure in output_root with .jpg extension.
+    Returns a summary: processed/skipped counts, failures, elapsed time, images/s.
+    """
+    start = time.perf_counter()
+    jobs, skipped = find_work(input_root, output_root, force)
+    workers = workers or os.cpu_count() or 1
+
+    failures = []
+    if jobs:
+        work = partial(process_image, desired_size=tuple(desired_size), quality=quality)
+        # Chunks keep inter-process overhead small for many small images
+        chunksize = max(1, min(64, len(jobs) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for (input_path, _), error in zip(jobs, pool.map(work, jobs, chunksize=chunksize)):
+                if error:
+                    failures.append((input_path, error))
+
+    elapsed = time.perf_counter() - start
+    processed = len(jobs) - len(failures)
+    return {
+        "processed": processed,
+        "skipped": skipped,
+        "failed": failures,
+        "workers": workers,
+        "elapsed_s": elapsed,
+        "images_per_s": processed / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def log_summary(summary, max_failures=20):
+    logging.info(
+        f"Processed {summary['processed']} images in {summary['elapsed_s']:.1f}s "
+        f"({summary['images_per_s']:.1f} images/s, {summary['workers']} workers), "
+        f"skipped {summary['skipped']} up to date, {len(summary['failed'])} failed"
+    )
+    for input_path, error in summary["failed"][:max_failures]:
+        logging.error(f"Failed: {input_path} | Reason: {error}")
+    if len(summary["failed"]) > max_failures:
+        logging.error(f"... and {len(summary['failed']) - max_failures} more failures")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Resize and pad a raw image dataset into a mirrored folder of JPEGs"
+    )
+    parser.add_argument("input_root", nargs="?", default="data/raw", help="Raw dataset folder")
+    parser.add_argument("output_root", nargs="?", default="data/processed", help="Output folder")
+    parser.add_argument("--size", type=int, nargs=2, default=(224, 224), metavar=("W", "H"),
+                        help="Output size (default: 224 224)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--quality", type=int, default=95, help="JPEG quality (default: 95)")
+    parser.add_argument("--force", action="store_true", help="Re-process images whose output is up to date")
+    args = parser.parse_args(argv)
+
+    summary = preprocess_images(args.input_root, args.output_root, args.size,
+                                workers=args.workers, force=args.force, quality=args.quality)
+    log_summary(summary)
+    return 1 if summary["failed"] else 0
+
 
-            try:
-                with Image.open(input_path) as img:
-                    img = img.convert("RGB")  # Ensure 3 channels
-                    resized_img = resize_with_padding(img, desired_size)
-                    resized_img.save(output_path, format="JPEG", quality=95)
-                    logging.info(f"Processed: {input_path} -> {output_path}")
-            except Exception as e:
-                logging.error(f"Failed: {input_path} | Reason: {e}")
-
-# if __name__ == "__main__":
-#     preprocess_images("data/raw", "data/processed", desired_size=(224, 224))
+if __name__ == "__main__":
+    raise SystemExit(main())
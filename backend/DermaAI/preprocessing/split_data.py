@@ -1,6 +1,9 @@
+import argparse
+import json
 import os
-import shutil
 import random
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 
 # Paths
@@ -8,6 +11,14 @@ BASE_DIR = '../cli/processed_sample_images'
 TARGET_DIRS = ['train', 'val', 'test']
 SPLIT_RATIOS = {'train': 0.7, 'val': 0.15, 'test': 0.15}
 
+# How split folders are populated: hardlinks/symlinks use no extra disk space,
+# "manifest" only writes <split>.csv files listing image paths and labels
+MODES = ('hardlink', 'symlink', 'copy', 'manifest')
+DEFAULT_SEED = 42
+# Image -> split assignments, so re-runs only place new images
+ASSIGNMENTS_FILE = 'splits.json'
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
 
 def ensure_dirs(base_path, class_names):
     for split in TARGET_DIRS:
@@ -15,33 +26,189 @@ def ensure_dirs(base_path, class_names):
             os.makedirs(os.path.join(base_path, split, cls), exist_ok=True)
 
 
-def split_dataset(base_dir, ratios):
-    classes = [d for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d)) and d not in TARGET_DIRS]
-    ensure_dirs(base_dir, classes)
+def load_assignments(base_dir):
+    path = os.path.join(base_dir, ASSIGNMENTS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_assignments(base_dir, state):
+    path = os.path.join(base_dir, ASSIGNMENTS_FILE)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def assign_splits(images, existing, ratios, rng):
+    """
+    Keep existing image -> split assignments and place new images (in a seeded
+    random order) wherever the split is furthest below its ratio.
+    """
+    assigned = {img: split for img, split in existing.items() if img in images}
+    counts = {split: 0 for split in TARGET_DIRS}
+    for split in assigned.values():
+        counts[split] += 1
+
+    new_images = sorted(img for img in images if img not in assigned)
+    rng.shuffle(new_images)
+    for img in new_images:
+        total = sum(counts.values()) + 1
+        split = max(TARGET_DIRS, key=lambda s: ratios[s] * total - counts[s])
+        assigned[img] = split
+        counts[split] += 1
+    return assigned
+
+
+def _matches(src_path, dest_path, mode, accept_copies=False):
+    """Whether an existing split entry is what `mode` places for src_path"""
+    if mode == 'symlink':
+        return os.path.islink(dest_path) and os.readlink(dest_path) == os.path.abspath(src_path)
+    if os.path.islink(dest_path):
+        return False
+    if os.path.samefile(src_path, dest_path):
+        return mode == 'hardlink'
+    if mode == 'hardlink' and not accept_copies:
+        return False
+    src, dest = os.stat(src_path), os.stat(dest_path)
+    return (src.st_size, src.st_mtime_ns) == (dest.st_size, dest.st_mtime_ns)  # copy2 keeps the mtime
+
+
+def _place(src_path, dest_path, mode, accept_copies=False):
+    """
+    Link/copy src_path to dest_path unless an entry of that mode is already there.
+    accept_copies keeps up-to-date copies in hardlink mode (the fallback when linking failed).
+    """
+    if os.path.lexists(dest_path):
+        if _matches(src_path, dest_path, mode, accept_copies):
+            return
+        os.remove(dest_path)  # placed by another mode, or an outdated copy
+    if mode == 'symlink':
+        os.symlink(os.path.abspath(src_path), dest_path)
+    elif mode == 'hardlink':
+        try:
+            os.link(src_path, dest_path)
+        except OSError:  # e.g. another filesystem, or no hardlink support
+            shutil.copy2(src_path, dest_path)
+    else:
+        shutil.copy2(src_path, dest_path)
 
-    for cls in tqdm(classes, desc="Splitting classes"):
+
+def _remove_unassigned(base_dir, assignments):
+    """
+    Drop split entries of images not assigned to that split: removed or re-assigned
+    images, and duplicates left by earlier runs (e.g. of the old random copy script)
+    """
+    for split in TARGET_DIRS:
+        split_dir = os.path.join(base_dir, split)
+        if not os.path.isdir(split_dir):
+            continue
+        for cls in os.listdir(split_dir):
+            class_dir = os.path.join(split_dir, cls)
+            if not os.path.isdir(class_dir):
+                continue
+            assigned = assignments.get(cls, {})
+            for img in os.listdir(class_dir):
+                if img.lower().endswith(IMAGE_EXTENSIONS) and assigned.get(img) != split:
+                    os.remove(os.path.join(class_dir, img))
+
+
+def _remove_placed(base_dir, previous):
+    """Drop every split entry placed by an earlier link/copy run (and emptied folders)"""
+    for cls, images in previous.items():
+        for img, split in images.items():
+            placed = os.path.join(base_dir, split, cls, img)
+            if os.path.lexists(placed):
+                os.remove(placed)
+    for split in TARGET_DIRS:
+        for cls in previous:
+            try:
+                os.rmdir(os.path.join(base_dir, split, cls))
+            except OSError:  # missing, or holds files we didn't place
+                pass
+        try:
+            os.rmdir(os.path.join(base_dir, split))
+        except OSError:
+            pass
+
+
+def write_manifests(base_dir, assignments):
+    """<split>.csv with 'path,label' rows (paths relative to base_dir)"""
+    rows = {split: [] for split in TARGET_DIRS}
+    for cls in sorted(assignments):
+        for img, split in sorted(assignments[cls].items()):
+            rows[split].append(f"{cls}/{img},{cls}")
+    for split, lines in rows.items():
+        with open(os.path.join(base_dir, f"{split}.csv"), 'w') as f:
+            f.write("path,label\n" + "".join(line + "\n" for line in lines))
+
+
+def split_dataset(base_dir, ratios, mode='hardlink', seed=DEFAULT_SEED, workers=8):
+    """
+    Split each class folder of base_dir into train/val/test.
+    Assignments are seeded and saved to splits.json: re-runs keep them and only
+    place new images, so adding data never reshuffles existing splits.
+    Split folder entries that aren't assigned there, or were placed by another
+    mode, are replaced; switching to manifest mode removes the entries placed by
+    an earlier hardlink/symlink/copy run, so the manifests are the only split.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode}. Choose one of: {', '.join(MODES)}")
+    classes = sorted(
+        d for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d)) and d not in TARGET_DIRS
+    )
+
+    state = load_assignments(base_dir)
+    if state and state.get('seed') != seed:
+        print(f"⚠️ Keeping existing assignments made with seed {state.get('seed')}; new images use seed {seed}.")
+    previous = state.get('assignments', {})
+    assignments = {}
+    for cls in classes:
         class_path = os.path.join(base_dir, cls)
-        images = [f for f in os.listdir(class_path) if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
-        random.shuffle(images)
+        images = {f for f in os.listdir(class_path) if f.lower().endswith(IMAGE_EXTENSIONS)}
+        rng = random.Random(f"{seed}:{cls}")  # per class, so adding a class changes nothing else
+        assignments[cls] = assign_splits(images, previous.get(cls, {}), ratios, rng)
+
+    if mode == 'manifest':
+        if state.get('mode', 'hardlink') != 'manifest':  # files without a mode predate manifest mode
+            _remove_placed(base_dir, previous)
+        write_manifests(base_dir, assignments)
+    else:
+        ensure_dirs(base_dir, classes)
+        _remove_unassigned(base_dir, assignments)
+        # Copies from an earlier hardlink run are its fallback for unlinkable files
+        accept_copies = state.get('mode') == 'hardlink'
+        tasks = [
+            (os.path.join(base_dir, cls, img), os.path.join(base_dir, split, cls, img))
+            for cls in classes
+            for img, split in assignments[cls].items()
+        ]
+        # Linking is syscall-bound, so threads overlap the filesystem round trips
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(tqdm(pool.map(lambda t: _place(*t, mode, accept_copies), tasks), total=len(tasks),
+                      desc="Placing images"))
 
-        total = len(images)
-        train_end = int(total * ratios['train'])
-        val_end = train_end + int(total * ratios['val'])
+    save_assignments(base_dir, {'seed': seed, 'ratios': ratios, 'mode': mode, 'assignments': assignments})
+    counts = {split: sum(list(a.values()).count(split) for a in assignments.values()) for split in TARGET_DIRS}
+    print(f"✅ Dataset splitting complete ({mode}): "
+          + ", ".join(f"{split}={count}" for split, count in counts.items()))
+    return assignments
 
-        split_map = {
-            'train': images[:train_end],
-            'val': images[train_end:val_end],
-            'test': images[val_end:]
-        }
 
-        for split, split_images in split_map.items():
-            for img_name in split_images:
-                src_path = os.path.join(class_path, img_name)
-                dest_path = os.path.join(base_dir, split, cls, img_name)
-                shutil.copy2(src_path, dest_path)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split class folders into train/val/test")
+    parser.add_argument("base_dir", nargs="?", default=BASE_DIR, help="Folder with one subfolder per class")
+    parser.add_argument("--mode", choices=MODES, default="hardlink", help="How to populate the splits")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Shuffle seed for new images")
+    parser.add_argument("--ratios", type=float, nargs=3, metavar=("TRAIN", "VAL", "TEST"),
+                        default=[SPLIT_RATIOS[s] for s in TARGET_DIRS], help="Split ratios")
+    parser.add_argument("--workers", type=int, default=8, help="Threads creating links/copies")
+    args = parser.parse_args(argv)
 
-    print("✅ Dataset splitting complete.")
+    split_dataset(args.base_dir, dict(zip(TARGET_DIRS, args.ratios)), args.mode, args.seed, args.workers)
 
 
 if __name__ == "__main__":
-    split_dataset(BASE_DIR, SPLIT_RATIOS)
+    main()
@@ -0,0 +1,31 @@
+# preprocessing/test_image_resizer.py
+import os
+
+from PIL import Image
+
+import image_resizer
+
+
+def test_reruns_skip_up_to_date_images_and_report_failures(tmp_path):
+    raw, out = tmp_path / "raw", tmp_path / "processed"
+    (raw / "nevus").mkdir(parents=True)
+    Image.new("RGB", (640, 480), "red").save(raw / "nevus" / "a.png")
+    Image.new("RGB", (300, 600), "blue").save(raw / "nevus" / "b.jpeg")
+    args = [str(raw), str(out), "--workers", "1"]
+
+    assert image_resizer.main(args) == 0
+    outputs = sorted(p.relative_to(out).as_posix() for p in out.rglob("*") if p.is_file())
+    assert outputs == ["nevus/a.jpg", "nevus/b.jpg"]
+    with Image.open(out / "nevus" / "a.jpg") as img:
+        assert img.size == (224, 224)
+
+    summary = image_resizer.preprocess_images(str(raw), str(out), workers=1)
+    assert (summary["processed"], summary["skipped"]) == (0, 2)
+
+    (raw / "nevus" / "broken.jpg").write_bytes(b"not an image")
+    os.utime(out / "nevus" / "a.jpg", (1, 1))  # older than its input: re-processed
+    summary = image_resizer.preprocess_images(str(raw), str(out), workers=1)
+    assert (summary["processed"], summary["skipped"]) == (1, 1)
+    assert [path for path, _ in summary["failed"]] == [str(raw / "nevus" / "broken.jpg")]
+    assert not list(out.rglob("broken*"))  # no output or leftover .tmp for the failure
+    assert image_resizer.main(args) == 1
@@ -0,0 +1,84 @@
+# preprocessing/test_split_data.py
+import json
+import os
+
+import split_data
+
+RATIOS = {'train': 0.7, 'val': 0.15, 'test': 0.15}
+
+
+def _dataset(base, counts):
+    for cls, count in counts.items():
+        os.makedirs(base / cls, exist_ok=True)
+        for i in range(count):
+            (base / cls / f"{cls}_{i}.jpg").write_bytes(b"jpeg")
+
+
+def _placed(base):
+    return sorted(
+        p.relative_to(base).as_posix() for split in split_data.TARGET_DIRS for p in (base / split).rglob("*.jpg")
+    )
+
+
+def test_seeded_assignments_are_stable(tmp_path):
+    for name in ("a", "b"):
+        _dataset(tmp_path / name, {"nevus": 20, "bcc": 7})
+    first = split_data.split_dataset(str(tmp_path / "a"), RATIOS, mode='symlink', seed=7)
+    assert split_data.split_dataset(str(tmp_path / "b"), RATIOS, mode='symlink', seed=7) == first
+    assert split_data.split_dataset(str(tmp_path / "a"), RATIOS, mode='symlink', seed=7) == first
+    assert list(first["nevus"].values()).count('train') == 14
+
+
+def test_new_images_keep_existing_splits_and_stale_entries_go(tmp_path):
+    _dataset(tmp_path, {"nevus": 20})
+    before = split_data.split_dataset(str(tmp_path), RATIOS, mode='hardlink')["nevus"]
+
+    _dataset(tmp_path, {"nevus": 30})
+    os.remove(tmp_path / "nevus" / "nevus_0.jpg")
+    after = split_data.split_dataset(str(tmp_path), RATIOS, mode='hardlink')["nevus"]
+
+    assert all(after[img] == split for img, split in before.items() if img != "nevus_0.jpg")
+    assert "nevus_0.jpg" not in after and len(after) == 29
+    assert _placed(tmp_path) == sorted(f"{split}/nevus/{img}" for img, split in after.items())
+
+
+def test_switching_modes_replaces_placed_entries(tmp_path):
+    _dataset(tmp_path, {"nevus": 10})
+    split_data.split_dataset(str(tmp_path), RATIOS, mode='symlink')
+
+    def entries():
+        return [tmp_path / placed for placed in _placed(tmp_path)]
+
+    assignments = split_data.split_dataset(str(tmp_path), RATIOS, mode='hardlink')
+    assert all(not p.is_symlink() and p.samefile(tmp_path / "nevus" / p.name) for p in entries())
+    split_data.split_dataset(str(tmp_path), RATIOS, mode='copy')
+    assert all(not p.is_symlink() and not p.samefile(tmp_path / "nevus" / p.name) for p in entries())
+    split_data.split_dataset(str(tmp_path), RATIOS, mode='symlink')
+    assert all(p.is_symlink() for p in entries())
+    assert _placed(tmp_path) == sorted(f"{split}/nevus/{img}" for img, split in assignments["nevus"].items())
+
+
+def test_entries_from_the_old_random_script_are_reconciled(tmp_path):
+    _dataset(tmp_path, {"nevus": 10})
+    for split in split_data.TARGET_DIRS:  # every image copied into every split
+        os.makedirs(tmp_path / split / "nevus")
+        for img in os.listdir(tmp_path / "nevus"):
+            (tmp_path / split / "nevus" / img).write_bytes(b"old copy")
+
+    assignments = split_data.split_dataset(str(tmp_path), RATIOS, mode='hardlink')
+
+    assert _placed(tmp_path) == sorted(f"{split}/nevus/{img}" for img, split in assignments["nevus"].items())
+    assert all((tmp_path / p).samefile(tmp_path / "nevus" / os.path.basename(p)) for p in _placed(tmp_path))
+
+
+def test_manifest_mode_replaces_earlier_links(tmp_path):
+    _dataset(tmp_path, {"nevus": 10, "bcc": 4})
+    assignments = split_data.split_dataset(str(tmp_path), RATIOS, mode='symlink')
+    assert _placed(tmp_path)
+
+    assert split_data.split_dataset(str(tmp_path), RATIOS, mode='manifest') == assignments
+    assert not any((tmp_path / split).exists() for split in split_data.TARGET_DIRS)
+    rows = [line for split in split_data.TARGET_DIRS
+            for line in (tmp_path / f"{split}.csv").read_text().splitlines()[1:]]
+    assert sorted(rows) == sorted(f"{cls}/{img},{cls}" for cls in assignments for img in assignments[cls])
+    assert json.loads((tmp_path / split_data.ASSIGNMENTS_FILE).read_text())["mode"] == 'manifest'
@@ -21,6 +21,11 @@ setup(
         "requests~=2.32.4",
         "rich~=14.1.0"
     ],
+    extras_require={
+        "onnx": ["onnx~=1.18.0", "onnxruntime~=1.22.1"],
+        "safetensors": ["safetensors~=0.6.2"],
+        "parquet": ["pyarrow~=26.0"],
+    },
 
     entry_points={
         "console_scripts": [